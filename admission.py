@@ -0,0 +1,131 @@
+"""
+Admission control for the password-hashing endpoints.
+
+Sign-in and sign-up spend most of their time in deliberately slow hash
+functions. ``guard`` sits in front of those views and rejects a POST before
+any hashing starts:
+
+* a per-client-IP token bucket and a per-account (email) token bucket
+  answer 429 Too Many Requests with a Retry-After header;
+* ``hashing()`` caps how many hashes run at once in this process and answers
+  503 Service Unavailable when no slot frees up almost immediately.
+
+Like the caches, these limits are per process. Each worker enforces them on
+its own, so the effective site-wide limit scales with the worker count.
+"""
+import math
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from contextlib import contextmanager
+from functools import wraps
+
+from flask import current_app, request
+from werkzeug.exceptions import ServiceUnavailable, TooManyRequests
+
+# How long a request may wait for a hashing slot before it is turned away
+HASH_WAIT_SECONDS = 0.1
+
+# reason -> requests rejected, exported by metrics.render
+rejections = defaultdict(int)
+
+
+class Overloaded(Exception):
+    """Raised by hashing() when every hashing slot is busy."""
+
+
+class TokenBucketTable:
+    """One token bucket per key, refilled continuously, bounded in size."""
+
+    def __init__(self, per_minute, burst, maxkeys=10000):
+        self.configure(per_minute, burst)
+        self.maxkeys = maxkeys
+        self.lock = threading.Lock()
+        self.buckets = OrderedDict()
+
+    def configure(self, per_minute, burst):
+        self.rate = per_minute / 60.0
+        self.burst = max(1, burst)
+
+    def take(self, key):
+        """Spend one token for ``key``. Returns 0 if allowed, else seconds to wait."""
+        now = time.monotonic()
+        with self.lock:
+            tokens, stamp = self.buckets.pop(key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - stamp) * self.rate)
+            allowed = tokens >= 1
+            self.buckets[key] = (tokens - 1 if allowed else tokens, now)
+            # Forgetting the least recently seen key only ever refills its bucket
+            while len(self.buckets) > self.maxkeys:
+                self.buckets.popitem(last=False)
+        if allowed:
+            return 0
+        return (1 - tokens) / self.rate if self.rate else 60.0
+
+    def clear(self):
+        with self.lock:
+            self.buckets.clear()
+
+
+ip_buckets = TokenBucketTable(per_minute=30, burst=10)
+account_buckets = TokenBucketTable(per_minute=6, burst=5)
+_hash_slots = threading.BoundedSemaphore(4)
+
+
+def init_app(app):
+    """
+    Size the buckets and the hashing cap from ``app.config``. ``guard`` does
+    this on its first POST, so the app factory need not import this module.
+    """
+    global _hash_slots
+    app.extensions['admission'] = True
+    ip_buckets.configure(app.config['AUTH_IP_PER_MINUTE'], app.config['AUTH_IP_BURST'])
+    account_buckets.configure(app.config['AUTH_ACCOUNT_PER_MINUTE'], app.config['AUTH_ACCOUNT_BURST'])
+    _hash_slots = threading.BoundedSemaphore(max(1, app.config['AUTH_HASH_CONCURRENCY']))
+
+
+@contextmanager
+def hashing():
+    """Hold one of the process-wide hashing slots, or raise Overloaded."""
+    # Release the semaphore we took even if init_app swaps it meanwhile
+    slots = _hash_slots
+    if not slots.acquire(timeout=HASH_WAIT_SECONDS):
+        raise Overloaded()
+    try:
+        yield
+    finally:
+        slots.release()
+
+
+def _reject(reason, exception, retry_after):
+    rejections[reason] += 1
+    raise exception(
+        description='Too many sign-in attempts right now. Please wait a moment and try again.',
+        retry_after=max(1, math.ceil(retry_after))
+    )
+
+
+def guard(view):
+    """Apply the IP and account buckets and the hashing cap to POSTs of ``view``."""
+    @wraps(view)
+    def decorated(*args, **kwargs):
+        if request.method != 'POST':
+            return view(*args, **kwargs)
+        if 'admission' not in current_app.extensions:
+            init_app(current_app)
+
+        wait = ip_buckets.take(request.remote_addr or 'unknown')
+        if wait:
+            _reject('ip', TooManyRequests, wait)
+
+        email = (request.form.get('email_address') or '').strip().lower()
+        if email:
+            wait = account_buckets.take(email)
+            if wait:
+                _reject('account', TooManyRequests, wait)
+
+        try:
+            return view(*args, **kwargs)
+        except Overloaded:
+            _reject('concurrency', ServiceUnavailable, 1)
+    return decorated
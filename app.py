@@ -1,75 +1,46 @@
 import os
 from flask import Flask, render_template, redirect, url_for, request
 from flask_login import LoginManager, current_user
-from werkzeug.security import generate_password_hash
 from datetime import datetime
+from sqlalchemy import insert, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 
+from config import Config
+import assets
+import conditional
+import fragments
+import template_cache
+import metrics
 from models import (
     db, Account, AccessLevel, Clinic,
     Provider, Recipient, TimeSlot,
-    Session, ClinicalNote
+    Session, ClinicalNote, SchemaRevision
 )
-
-# --------------------------------------------------------
-# App Setup
-# --------------------------------------------------------
-app = Flask(__name__)
-
-# Configuration for both local and serverless environments
-SECRET_KEY = os.environ.get('SECRET_KEY') or 'dev-secret-change-in-production'
-app.config['SECRET_KEY'] = SECRET_KEY
-
-# Database configuration - supports both SQLite and PostgreSQL
-DATABASE_URL = os.environ.get('DATABASE_URL')
-if DATABASE_URL:
-    # Use environment database (PostgreSQL on Netlify)
-    app.config['SQLALCHEMY_DATABASE_URI'] = DATABASE_URL
-else:
-    # Fallback to SQLite
-    db_dir = os.path.join(os.path.dirname(__file__), 'instance')
-    os.makedirs(db_dir, exist_ok=True)
-    db_path = os.path.join(db_dir, 'app.db')
-    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{db_path}'
-
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-
-db.init_app(app)
+import counters
+import reference
+import identity_cache
 
 # --------------------------------------------------------
 # Login Manager Configuration
 # --------------------------------------------------------
 login_mgr = LoginManager()
 login_mgr.login_view = 'identity.signin'
-login_mgr.init_app(app)
 
 
 @login_mgr.user_loader
 def load_user(user_id):
-    """Return account object by user id."""
+    """Return the cached identity (account plus role) for a user id."""
     try:
-        return Account.query.get(int(user_id))
+        return identity_cache.load(int(user_id))
     except:
         return None
 
 
-# --------------------------------------------------------
-# Blueprint Registration
-# --------------------------------------------------------
-from routes.identity import identity_bp
-from routes.governance import governance_bp
-from routes.provision import provision_bp
-from routes.clientele import clientele_bp
-
-app.register_blueprint(identity_bp)
-app.register_blueprint(governance_bp, url_prefix='/governance')
-app.register_blueprint(provision_bp, url_prefix='/provision')
-app.register_blueprint(clientele_bp, url_prefix='/clientele')
-
-
 # --------------------------------------------------------
 # Routes
 # --------------------------------------------------------
-@app.route('/')
 def home():
     """Redirect users to their respective dashboards."""
     if current_user.is_authenticated:
@@ -85,9 +56,109 @@ def home():
     return render_template('landing.html')
 
 
+# --------------------------------------------------------
+# App Factory
+# --------------------------------------------------------
+def create_app():
+    """Build and configure the Flask app."""
+    app = Flask(__name__)
+
+    # Configuration for both local and serverless environments
+    SECRET_KEY = os.environ.get('SECRET_KEY') or 'dev-secret-change-in-production'
+    app.config['SECRET_KEY'] = SECRET_KEY
+
+    # Database configuration - supports both SQLite and PostgreSQL
+    DATABASE_URL = os.environ.get('DATABASE_URL')
+    if DATABASE_URL:
+        # Use environment database (PostgreSQL on Netlify)
+        app.config['SQLALCHEMY_DATABASE_URI'] = DATABASE_URL
+    else:
+        # Fallback to SQLite
+        db_dir = os.path.join(os.path.dirname(__file__), 'instance')
+        os.makedirs(db_dir, exist_ok=True)
+        db_path = os.path.join(db_dir, 'app.db')
+        app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{db_path}'
+
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['ITEMS_PER_PAGE'] = int(os.environ.get('ITEMS_PER_PAGE') or Config.ITEMS_PER_PAGE)
+    for setting in ('AUTH_IP_PER_MINUTE', 'AUTH_IP_BURST', 'AUTH_ACCOUNT_PER_MINUTE',
+                    'AUTH_ACCOUNT_BURST', 'AUTH_HASH_CONCURRENCY'):
+        app.config[setting] = int(os.environ.get(setting) or getattr(Config, setting))
+    fragment_cache = os.environ.get('FRAGMENT_CACHE')
+    app.config['FRAGMENT_CACHE'] = (
+        Config.FRAGMENT_CACHE if not fragment_cache else fragment_cache.lower() in ('1', 'true', 'yes')
+    )
+
+    db.init_app(app)
+    assets.init_app(app)
+    conditional.init_app(app)
+    fragments.init_app(app)
+    template_cache.init_app(app)
+    metrics.init_app(app)
+    login_mgr.init_app(app)
+
+    # Blueprint Registration
+    from routes.identity import identity_bp
+    from routes.governance import governance_bp
+    from routes.provision import provision_bp
+    from routes.clientele import clientele_bp
+    from routes.telemetry import telemetry_bp
+
+    app.register_blueprint(identity_bp)
+    app.register_blueprint(governance_bp, url_prefix='/governance')
+    app.register_blueprint(provision_bp, url_prefix='/provision')
+    app.register_blueprint(clientele_bp, url_prefix='/clientele')
+    app.register_blueprint(telemetry_bp)
+
+    app.add_url_rule('/', 'home', home)
+    return app
+
+
+app = create_app()
+
+
 # --------------------------------------------------------
 # Initial Setup: Create Roles, Admin, and Departments
 # --------------------------------------------------------
+# Bump when the seed data below changes so current databases re-seed once
+SEED_VERSION = '1'
+
+
+def setup_marker():
+    """schema_revision row recorded once the schema and seed data are current."""
+    from migrations import head_revision
+    return f'setup:{head_revision()}:seed-{SEED_VERSION}'
+
+
+def database_is_current():
+    """One primary-key lookup: True when schema and seed data need no work."""
+    try:
+        return db.session.get(SchemaRevision, setup_marker()) is not None
+    except SQLAlchemyError:
+        # Brand new database without the schema_revision table
+        db.session.rollback()
+        return False
+
+
+def insert_missing(model, rows, key):
+    """
+    Insert ``rows`` in one statement, skipping those whose unique ``key``
+    column already exists. Returns the number of rows added.
+    """
+    dialect = db.engine.dialect.name
+    if dialect in ('sqlite', 'postgresql'):
+        dialect_insert = sqlite_insert if dialect == 'sqlite' else pg_insert
+        stmt = dialect_insert(model).values(rows).on_conflict_do_nothing(index_elements=[key])
+        return db.session.execute(stmt).rowcount
+
+    column = getattr(model, key)
+    existing = set(db.session.scalars(select(column).where(column.in_([r[key] for r in rows]))))
+    missing = [r for r in rows if r[key] not in existing]
+    if missing:
+        db.session.execute(insert(model), missing)
+    return len(missing)
+
+
 def initial_setup():
     """Populate initial roles, admin account, and clinic departments."""
     default_admin_email = 'admin@facilities.local'
@@ -95,10 +166,7 @@ def initial_setup():
 
     # --- Create Access Roles ---
     roles = ['admin', 'provider', 'patient']
-    for role in roles:
-        if not AccessLevel.query.filter_by(tier_name=role).first():
-            db.session.add(AccessLevel(tier_name=role))
-    db.session.commit()
+    insert_missing(AccessLevel, [{'tier_name': role} for role in roles], 'tier_name')
 
     # --- Department List ---
     departments = [
@@ -129,38 +197,56 @@ def initial_setup():
         'Infectious Diseases', 'Nuclear Medicine'
     ]
 
-    # Add each department if missing
-    for name in departments:
-        exists = Clinic.query.filter_by(clinic_title=name).first()
-        if not exists:
-            db.session.add(Clinic(clinic_title=name, clinic_notes=''))
-    db.session.commit()
+    # Add every missing department in one statement; bulk inserts skip the
+    # mapper events, so the dashboard counter is adjusted by hand
+    added = insert_missing(
+        Clinic, [{'clinic_title': name, 'clinic_notes': ''} for name in departments], 'clinic_title'
+    )
+    counters.adjust(Clinic, added)
 
     # --- Create Default Admin ---
-    admin_account = Account.query.filter_by(email_address=default_admin_email).first()
-
-    if not admin_account:
-        admin_role = AccessLevel.query.filter_by(tier_name='admin').first()
-        new_admin = Account(
-            email_address=default_admin_email,
-            credential_hash=generate_password_hash(default_admin_pass),
-            given_name='System',
-            surname='Administrator',
-            access_tier=admin_role
-        )
-        db.session.add(new_admin)
+    admin_exists = db.session.scalar(
+        select(Account.account_id).where(Account.email_address == default_admin_email)
+    )
+
+    if not admin_exists:
+        # Imported on first use, like the rest of the setup-only code
+        from werkzeug.security import generate_password_hash
+
+        admin_tier = select(AccessLevel.tier_id).where(AccessLevel.tier_name == 'admin').scalar_subquery()
+        insert_missing(Account, [{
+            'email_address': default_admin_email,
+            'credential_hash': generate_password_hash(default_admin_pass),
+            'given_name': 'System',
+            'surname': 'Administrator',
+            'tier_id': admin_tier,
+        }], 'email_address')
+
+    # --- Mark this seed version as applied ---
+    db.session.add(SchemaRevision(revision_id=setup_marker(), description=f'Seed data version {SEED_VERSION}'))
+    try:
         db.session.commit()
+    except IntegrityError:
+        # Another process finished the same setup first
+        db.session.rollback()
 
 
 # --------------------------------------------------------
 # Orchestration Function for Setup
 # --------------------------------------------------------
 def orchestrate_initial_setup():
-    """Safely run initial setup within app context."""
+    """
+    Safely run initial setup within app context. A database that already
+    carries the current setup marker costs one query and skips all of it.
+    """
     try:
         with app.app_context():
-            db.create_all()
-            initial_setup()
+            if not database_is_current():
+                from migrations import upgrade as upgrade_schema
+                db.create_all()
+                upgrade_schema()
+                initial_setup()
+            reference.warm()
     except Exception as e:
         print(f"Setup error (will continue): {e}")
 
@@ -169,7 +255,9 @@ def orchestrate_initial_setup():
 # App Runner
 # --------------------------------------------------------
 if __name__ == '__main__':
+    from migrations import upgrade as upgrade_schema
     with app.app_context():
         db.create_all()
+        upgrade_schema()
         initial_setup()
     app.run(debug=True)
@@ -0,0 +1,165 @@
+"""
+Fingerprinted, precompressed stylesheets.
+
+``build`` minifies every stylesheet in ``SOURCES`` and writes it to
+``static/dist`` under a content-hashed name (``style.<hash>.css``), next to
+``.gz`` and, when the optional brotli package is installed, ``.br``
+variants. A ``manifest.json`` maps each source name to its hashed file.
+
+Templates call ``asset_url('style.css')`` instead of
+``url_for('static', filename='style.css')``. It returns the hashed URL when
+a build is present and up to date, and the plain static URL otherwise (for
+example in a fresh checkout). Hashed files never change, so ``serve_asset``
+sends them with a one-year ``immutable`` Cache-Control and picks the
+precompressed variant the client accepts. No compression happens per request.
+
+Run ``python scripts/build_assets.py`` after editing a stylesheet. The
+Netlify build runs it on every deploy.
+"""
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+
+from flask import abort, current_app, request, send_from_directory, url_for
+
+try:
+    import brotli
+except ImportError:  # optional: .gz variants are always written
+    brotli = None
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+DIST = 'dist'
+MANIFEST = 'manifest.json'
+SOURCES = ('style.css', 'theme.css')
+HASH_LENGTH = 12
+IMMUTABLE = 'public, max-age=31536000, immutable'
+
+# Content-Encoding -> file suffix, in order of preference
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+_STRING = re.compile(r'"(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\'')
+_COMMENT = re.compile(r'/\*.*?\*/', re.S)
+_SPACE = re.compile(r'\s+')
+# Whitespace next to these never matters. ':' is left alone because
+# "a :hover" and "a:hover" are different selectors, and '+'/'-' because calc()
+# needs the spaces around them.
+_PUNCTUATION = re.compile(r'\s*([{};,>])\s*')
+
+
+def minify_css(source):
+    """Strip comments and redundant whitespace, leaving string literals intact."""
+    strings = []
+
+    def stash(match):
+        strings.append(match.group(0))
+        return f'\x00{len(strings) - 1}\x00'
+
+    css = _STRING.sub(stash, source)
+    css = _COMMENT.sub('', css)
+    css = _SPACE.sub(' ', css)
+    css = _PUNCTUATION.sub(r'\1', css)
+    css = re.sub(r':\s+', ':', css)
+    css = css.replace(';}', '}').strip()
+    return re.sub(r'\x00(\d+)\x00', lambda m: strings[int(m.group(1))], css)
+
+
+def fingerprint(content):
+    return hashlib.sha256(content).hexdigest()[:HASH_LENGTH]
+
+
+def build(static_dir=STATIC_DIR, sources=SOURCES):
+    """
+    Write the hashed and precompressed files plus the manifest into
+    ``static_dir/dist``, removing files left from earlier builds.
+    Returns the manifest (source name -> path relative to ``static_dir``).
+    """
+    out_dir = os.path.join(static_dir, DIST)
+    os.makedirs(out_dir, exist_ok=True)
+
+    manifest = {}
+    written = {MANIFEST}
+    for name in sources:
+        with open(os.path.join(static_dir, name), encoding='utf-8-sig') as fh:
+            content = minify_css(fh.read()).encode('utf-8')
+
+        stem, ext = os.path.splitext(name)
+        hashed = f'{stem}.{fingerprint(content)}{ext}'
+        variants = {hashed: content, hashed + '.gz': gzip.compress(content, compresslevel=9, mtime=0)}
+        if brotli:
+            variants[hashed + '.br'] = brotli.compress(content, quality=11)
+
+        for filename, data in variants.items():
+            with open(os.path.join(out_dir, filename), 'wb') as fh:
+                fh.write(data)
+        written.update(variants)
+        manifest[name] = f'{DIST}/{hashed}'
+
+    for filename in os.listdir(out_dir):
+        if filename not in written:
+            os.remove(os.path.join(out_dir, filename))
+
+    with open(os.path.join(out_dir, MANIFEST), 'w', encoding='utf-8') as fh:
+        json.dump(manifest, fh, indent=2, sort_keys=True)
+    return manifest
+
+
+def load_manifest(static_dir=STATIC_DIR):
+    """
+    The manifest written by ``build``, or {} when there is none or any
+    source stylesheet was edited after it was built.
+    """
+    path = os.path.join(static_dir, DIST, MANIFEST)
+    try:
+        built = os.path.getmtime(path)
+        with open(path, encoding='utf-8') as fh:
+            manifest = json.load(fh)
+    except (OSError, ValueError):
+        return {}
+
+    for name in manifest:
+        source = os.path.join(static_dir, name)
+        if os.path.exists(source) and os.path.getmtime(source) > built:
+            current_app.logger.warning(
+                'static/%s changed since the last asset build; serving unhashed files. '
+                'Run scripts/build_assets.py.', name
+            )
+            return {}
+    return manifest
+
+
+def asset_url(filename, **values):
+    """``url_for('static', filename=...)``, pointing at the hashed build when there is one."""
+    manifest = current_app.extensions.get('assets', {})
+    return url_for('static', filename=manifest.get(filename, filename), **values)
+
+
+def serve_asset(filename):
+    """Send a hashed file, precompressed when the client accepts it, cached for a year."""
+    out_dir = os.path.join(current_app.static_folder, DIST)
+    if filename == MANIFEST or filename.endswith(tuple(s for _, s in ENCODINGS)):
+        abort(404)
+
+    for coding, suffix in ENCODINGS:
+        if request.accept_encodings[coding] and os.path.exists(os.path.join(out_dir, filename + suffix)):
+            response = send_from_directory(out_dir, filename + suffix,
+                                           mimetype=mimetypes.guess_type(filename)[0],
+                                           max_age=31536000, conditional=True)
+            response.headers['Content-Encoding'] = coding
+            break
+    else:
+        response = send_from_directory(out_dir, filename, max_age=31536000, conditional=True)
+
+    response.headers['Cache-Control'] = IMMUTABLE
+    response.vary.add('Accept-Encoding')
+    return response
+
+
+def init_app(app):
+    """Load the manifest, expose ``asset_url`` to templates and route the hashed files."""
+    with app.app_context():
+        app.extensions['assets'] = load_manifest(app.static_folder)
+    app.jinja_env.globals['asset_url'] = asset_url
+    app.add_url_rule(f'{app.static_url_path}/{DIST}/<path:filename>', 'assets', serve_asset)
@@ -0,0 +1,80 @@
+"""
+Small in-process caches.
+
+``LRUCache`` is a thread-safe, size-bounded mapping with an optional
+time-to-live and hit/miss/eviction counters. Every named cache registers
+itself in ``CACHES`` so the metrics endpoint can report on all of them.
+
+These caches are per process: invalidation reaches only the worker that made
+the change, so the TTL bounds how stale other workers can be.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+# name -> LRUCache, for metrics and tests
+CACHES = {}
+
+_MISSING = object()
+
+
+class LRUCache:
+    """Least-recently-used cache with optional per-entry expiry."""
+
+    def __init__(self, name, maxsize=1024, ttl=None):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        CACHES[name] = self
+
+    def get(self, key, default=None):
+        with self.lock:
+            entry = self.entries.get(key, _MISSING)
+            if entry is not _MISSING:
+                value, expires = entry
+                if expires is None or expires > time.monotonic():
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self.entries[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value):
+        expires = time.monotonic() + self.ttl if self.ttl else None
+        with self.lock:
+            self.entries[key] = (value, expires)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_load(self, key, loader):
+        """Return the cached value, calling ``loader()`` and storing it on a miss."""
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = loader()
+            self.set(key, value)
+        return value
+
+    def invalidate(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self):
+        with self.lock:
+            return {
+                'size': len(self.entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
@@ -0,0 +1,287 @@
+"""
+Conditional GET (ETag / Last-Modified) for read-mostly pages.
+
+Every committed change to a table in ``VERSIONED_MODELS`` bumps that
+table's row in ``data_version``. This covers ORM flushes and bulk
+``insert()`` / ``update()`` / ``delete()`` statements run through
+``db.session``. The bump happens once per table per transaction, just
+before the commit, so the row lock is held only briefly.
+
+Tables in ``SCOPED_TABLES`` are also versioned per owner row. Time slots
+are versioned per provider under keys like ``time_slot:42``, so a change
+to one provider's slots leaves every other provider's pages and cache
+entries alone. ORM flushes record the owner themselves; bulk ``update()``
+and ``delete()`` statements cannot, so run ``touch_scope()`` next to them.
+
+A view wrapped in ``@conditional(Clinic, ...)`` reads the versions of the
+tables it renders with one primary-key query. It answers ``If-None-Match``
+or ``If-Modified-Since`` with 304 before the view runs: no row queries and
+no template rendering. The ETag also covers the signed-in user (every
+page shows their name and role menu) and the deployed templates and
+assets. Per-process caches those pages read from are dropped when a newer
+version appears, so other workers' changes are never served under a
+fresh ETag. A response is never given validators while flash messages are
+pending, because those are rendered only once.
+
+Writes made outside ``db.session`` (raw engine connections in maintenance
+scripts) are not seen. Run ``touch()`` afterwards, or the pages stay
+cached until the next tracked change.
+"""
+import hashlib
+import os
+from datetime import datetime
+from functools import wraps
+
+from flask import current_app, make_response, request, session
+from flask_login import current_user
+from sqlalchemy import event, insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+
+import reference
+from models import db, Account, Clinic, DataVersion, Provider, TimeSlot
+from scheduling import invalidate_open_slots
+
+# Tables whose changes invalidate cached pages. Accounts are always
+# included because provider and patient names live there.
+VERSIONED_MODELS = (Account, Clinic, Provider, TimeSlot)
+VERSIONED_TABLES = frozenset(model.__tablename__ for model in VERSIONED_MODELS)
+
+# Per-process caches the pages render from. Their TTLs allow a change made
+# in another worker to go unseen for a while, which would pin stale content
+# under a fresh ETag, so they are dropped as soon as a new version shows up.
+DEPENDENT_CACHES = {
+    Clinic.__tablename__: (reference.invalidate,),
+}
+
+# table_name -> (owner column, drop that owner's per-process cache entries)
+SCOPED_TABLES = {
+    TimeSlot.__tablename__: ('provider_id', invalidate_open_slots),
+}
+
+version_table = DataVersion.__table__
+
+_TOUCHED = 'data_version_touched'
+# table_name -> last version this process served pages for
+_seen = {}
+
+
+def seed():
+    """Create any missing version rows; commit with the caller."""
+    existing = set(db.session.scalars(select(DataVersion.table_name)))
+    for name in sorted(VERSIONED_TABLES - existing):
+        db.session.add(DataVersion(table_name=name, version=1, changed_on=datetime.utcnow()))
+
+
+def _bump(names):
+    return (
+        update(version_table)
+        .where(version_table.c.table_name.in_(sorted(names)))
+        .values(version=version_table.c.version + 1, changed_on=datetime.utcnow())
+    )
+
+
+def _bump_scoped(connection, keys):
+    """Bump per-owner version rows, creating the ones that do not exist yet."""
+    now = datetime.utcnow()
+    rows = [{'table_name': key, 'version': 1, 'changed_on': now} for key in sorted(keys)]
+    dialect = {'sqlite': sqlite, 'postgresql': postgresql}.get(connection.dialect.name)
+    if dialect is None:
+        connection.execute(_bump(keys))
+        existing = set(connection.scalars(
+            select(version_table.c.table_name).where(version_table.c.table_name.in_(sorted(keys)))
+        ))
+        missing = [row for row in rows if row['table_name'] not in existing]
+        if missing:
+            connection.execute(insert(version_table), missing)
+        return
+    statement = dialect.insert(version_table).values(rows)
+    connection.execute(statement.on_conflict_do_update(
+        index_elements=[version_table.c.table_name],
+        set_={'version': version_table.c.version + 1, 'changed_on': statement.excluded.changed_on},
+    ))
+
+
+def scope_key(table_name, owner_id):
+    return f'{table_name}:{owner_id}'
+
+
+def touch(*models):
+    """Mark tables as changed by writes the session did not see; commit with the caller."""
+    names = [m.__tablename__ for m in models] or VERSIONED_TABLES
+    db.session.connection().execute(_bump(names))
+
+
+def touch_scope(model, owner_id):
+    """Mark one owner's rows of a scoped table as changed; commit with the caller."""
+    _touched(db.session).add((model.__tablename__, owner_id))
+
+
+# -------------------------------------------------------------
+# Change tracking
+# -------------------------------------------------------------
+def _touched(session):
+    return session.info.setdefault(_TOUCHED, set())
+
+
+def _record_object(touched, obj):
+    name = getattr(obj, '__tablename__', None)
+    touched.add(name)
+    if name in SCOPED_TABLES:
+        touched.add((name, getattr(obj, SCOPED_TABLES[name][0])))
+
+
+@event.listens_for(db.session, 'after_flush')
+def _record_flush(session, flush_context):
+    touched = _touched(session)
+    for obj in session.new | session.deleted:
+        _record_object(touched, obj)
+    for obj in session.dirty:
+        if session.is_modified(obj):
+            _record_object(touched, obj)
+
+
+@event.listens_for(db.session, 'do_orm_execute')
+def _record_statement(state):
+    if state.is_insert or state.is_update or state.is_delete:
+        table = getattr(state.statement, 'table', None)
+        name = getattr(table, 'name', None)
+        touched = _touched(state.session)
+        touched.add(name)
+        if state.is_insert and name in SCOPED_TABLES:
+            # Bulk inserts carry the owner in their parameters
+            column = SCOPED_TABLES[name][0]
+            params = state.parameters
+            for row in params if isinstance(params, (list, tuple)) else [params or {}]:
+                if column in row:
+                    touched.add((name, row[column]))
+
+
+@event.listens_for(db.session, 'before_commit')
+def _bump_versions(session):
+    # before_commit runs ahead of the final flush; flush now so its changes count
+    session.flush()
+    touched = _touched(session)
+    names = touched & VERSIONED_TABLES
+    if names:
+        session.connection().execute(_bump(names))
+    scoped = {scope_key(*entry) for entry in touched if isinstance(entry, tuple)}
+    if scoped:
+        _bump_scoped(session.connection(), scoped)
+    session.info.pop(_TOUCHED, None)
+
+
+@event.listens_for(db.session, 'after_soft_rollback')
+def _forget_rolled_back(session, previous_transaction):
+    if not session.in_transaction():
+        session.info.pop(_TOUCHED, None)
+
+
+# -------------------------------------------------------------
+# Validators
+# -------------------------------------------------------------
+def build_tag(app):
+    """
+    Fingerprint of the deployed templates and asset manifest, so a release
+    that changes markup but no data still invalidates cached pages.
+    """
+    digest = hashlib.sha1()
+    for root, dirs, files in os.walk(os.path.join(app.root_path, app.template_folder)):
+        dirs.sort()
+        for name in sorted(files):
+            stat = os.stat(os.path.join(root, name))
+            digest.update(f'{root}/{name}:{stat.st_size}:{stat.st_mtime_ns};'.encode())
+    digest.update(repr(sorted(app.extensions.get('assets', {}).items())).encode())
+    return digest.hexdigest()[:12]
+
+
+def versions(models, scopes=()):
+    """
+    {key: (version, changed_on)} for ``models`` and the (model, owner_id)
+    pairs in ``scopes``, in one query. An owner whose rows never changed is
+    at version 0.
+    """
+    owners = {scope_key(m.__tablename__, owner_id): (m.__tablename__, owner_id) for m, owner_id in scopes}
+    names = sorted({m.__tablename__ for m in models} | {Account.__tablename__} | set(owners))
+    rows = db.session.execute(
+        select(DataVersion.table_name, DataVersion.version, DataVersion.changed_on)
+        .where(DataVersion.table_name.in_(names))
+    ).all()
+    current = {key: (0, None) for key in owners}
+    current.update((name, (version, changed_on)) for name, version, changed_on in rows)
+    for name, (version, _) in current.items():
+        if _seen.get(name) == version:
+            continue
+        if name in owners:
+            table_name, owner_id = owners[name]
+            SCOPED_TABLES[table_name][1](owner_id)
+        else:
+            for drop in DEPENDENT_CACHES.get(name, ()):
+                drop()
+        _seen[name] = version
+    return current
+
+
+def validators(models, scopes=()):
+    """(etag, last_modified) for the current user, the given tables and owner scopes."""
+    current = versions(models, scopes)
+    # The layout shows the user's name and role menu, taken from the
+    # identity cache; key on what will actually be rendered
+    user_scope = (
+        (current_user.get_id(), current_user.given_name, current_user.access_tier.tier_name)
+        if current_user.is_authenticated else 'anonymous'
+    )
+    parts = [current_app.extensions['conditional'], request.endpoint, user_scope]
+    parts += [f'{name}.{current[name][0]}' for name in sorted(current)]
+    etag = hashlib.sha1('|'.join(map(str, parts)).encode()).hexdigest()[:20]
+    stamps = [changed_on for _, changed_on in current.values() if changed_on]
+    last_modified = max(stamps).replace(microsecond=0) if stamps else None
+    return etag, last_modified
+
+
+def _not_modified(etag, last_modified):
+    # If-None-Match wins whenever the client sends it (RFC 9110, 13.2.2)
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    since = request.if_modified_since
+    return bool(since and last_modified and last_modified <= since.replace(tzinfo=None))
+
+
+def conditional(*models, scoped=None):
+    """
+    Serve GETs of the wrapped view with validators built from the versions
+    of ``models`` (plus accounts), answering 304 when the client is current.
+    ``scoped`` maps a model in ``SCOPED_TABLES`` to the view argument naming
+    the owner, e.g. ``scoped={TimeSlot: 'provider_id'}``: only that owner's
+    rows count.
+    """
+    scoped = dict(scoped or {})
+
+    def decorator(view):
+        @wraps(view)
+        def decorated(*args, **kwargs):
+            if request.method not in ('GET', 'HEAD') or session.get('_flashes'):
+                return view(*args, **kwargs)
+
+            scopes = [(model, kwargs[argument]) for model, argument in scoped.items()]
+            etag, last_modified = validators(models, scopes)
+            if _not_modified(etag, last_modified):
+                response = current_app.response_class(status=304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+            response.set_etag(etag)
+            if last_modified:
+                response.last_modified = last_modified
+            # Browsers keep the page but must revalidate before reusing it
+            response.cache_control.private = True
+            response.cache_control.no_cache = True
+            return response
+        return decorated
+    return decorator
+
+
+def init_app(app):
+    """Fingerprint the deployed build; call after ``assets.init_app``."""
+    app.extensions['conditional'] = build_tag(app)
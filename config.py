@@ -23,3 +23,13 @@ class Config:
 
     # Pagination fallback value
     ITEMS_PER_PAGE = 20
+
+    # Serve {% cache %} blocks from the fragment cache
+    FRAGMENT_CACHE = True
+
+    # Admission control for sign-in / sign-up (per worker process)
+    AUTH_IP_PER_MINUTE = 30
+    AUTH_IP_BURST = 10
+    AUTH_ACCOUNT_PER_MINUTE = 6
+    AUTH_ACCOUNT_BURST = 5
+    AUTH_HASH_CONCURRENCY = os.cpu_count() or 2
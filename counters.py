@@ -0,0 +1,73 @@
+"""
+Incrementally maintained row counts for the admin dashboard.
+
+Inserting or deleting a Provider, Recipient, Session or Clinic through the ORM
+bumps its row in the ``entity_counter`` table inside the same flush, so the
+dashboard reads four totals with one primary-key query instead of four
+``COUNT(*)`` scans. Bulk ``Query.delete()`` calls bypass mapper events and
+must call ``adjust`` themselves.
+"""
+from sqlalchemy import event, func, update
+from sqlalchemy.exc import IntegrityError
+
+from models import db, EntityCounter, Provider, Recipient, Session, Clinic
+
+COUNTED_MODELS = (Provider, Recipient, Session, Clinic)
+
+counter_table = EntityCounter.__table__
+
+
+def _increment(name, delta):
+    return (
+        update(counter_table)
+        .where(counter_table.c.counter_name == name)
+        .values(counter_value=counter_table.c.counter_value + delta)
+    )
+
+
+def _track(model):
+    name = model.__tablename__
+
+    @event.listens_for(model, 'after_insert')
+    def counted_insert(mapper, connection, target):
+        connection.execute(_increment(name, 1))
+
+    @event.listens_for(model, 'after_delete')
+    def counted_delete(mapper, connection, target):
+        connection.execute(_increment(name, -1))
+
+
+for _model in COUNTED_MODELS:
+    _track(_model)
+
+
+def adjust(model, delta):
+    """Apply a delta for rows removed with a bulk query; commit with the caller."""
+    if delta:
+        db.session.execute(_increment(model.__tablename__, delta))
+
+
+def recount(models=COUNTED_MODELS):
+    """Rebuild counters from COUNT(*) and return them as {table_name: value}."""
+    totals = {}
+    for model in models:
+        name = model.__tablename__
+        totals[name] = db.session.query(func.count()).select_from(model).scalar()
+        db.session.merge(EntityCounter(counter_name=name, counter_value=totals[name]))
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # A concurrent request seeded the same counter first
+        db.session.rollback()
+    return totals
+
+
+def dashboard_counts():
+    """Return {table_name: row_count}, seeding any counter that is missing."""
+    totals = dict(
+        db.session.query(EntityCounter.counter_name, EntityCounter.counter_value).all()
+    )
+    missing = [m for m in COUNTED_MODELS if m.__tablename__ not in totals]
+    if missing:
+        totals.update(recount(missing))
+    return totals
@@ -0,0 +1,73 @@
+"""
+Password hashing helpers shared by the bulk maintenance tools and sign-in.
+
+Hashing is deliberately slow, so bulk jobs (re-hashing legacy plain-text
+credentials, importing accounts from CSV) fan the work out over a process
+pool. ``hash_one`` stays a top-level function so it can be pickled into
+worker processes.
+"""
+import os
+from functools import cache
+
+from werkzeug.security import generate_password_hash
+
+# Prefixes werkzeug writes in front of every hash it produces
+HASH_PREFIXES = ('pbkdf2:', 'scrypt:')
+
+
+def is_hashed(value):
+    """True if ``value`` already looks like a werkzeug password hash."""
+    return bool(value) and value.startswith(HASH_PREFIXES)
+
+
+def hash_one(plain, method=None):
+    if method:
+        return generate_password_hash(plain, method=method)
+    return generate_password_hash(plain)
+
+
+def hash_method(value):
+    """The method and cost a werkzeug hash was made with, e.g. 'scrypt:32768:8:1'."""
+    return value.partition('$')[0]
+
+
+@cache
+def default_method():
+    """Method and cost ``generate_password_hash`` currently uses by default."""
+    # Read back from a real hash so a werkzeug upgrade that raises the cost
+    # is picked up without touching this module
+    return hash_method(generate_password_hash(''))
+
+
+def needs_rehash(value):
+    """True if a stored hash was made with another method or cost than the default."""
+    return hash_method(value) != default_method()
+
+
+def worker_count(requested=None):
+    return max(1, requested or os.cpu_count() or 1)
+
+
+def hash_pool(workers=None):
+    """A process pool sized for hashing; use as a context manager."""
+    # Imported on first use: multiprocessing is only needed by bulk jobs
+    from concurrent.futures import ProcessPoolExecutor
+    return ProcessPoolExecutor(max_workers=worker_count(workers))
+
+
+def hash_many(plains, method=None, pool=None, workers=None):
+    """
+    Hash every string in ``plains`` and return the hashes in the same order.
+    Runs inline for a single worker or a handful of values, otherwise on
+    ``pool`` (or a temporary pool of ``workers`` processes).
+    """
+    plains = list(plains)
+    if pool is None and (worker_count(workers) == 1 or len(plains) < 4):
+        return [hash_one(p, method) for p in plains]
+
+    methods = [method] * len(plains)
+    chunksize = max(1, len(plains) // (worker_count(workers) * 4))
+    if pool is not None:
+        return list(pool.map(hash_one, plains, methods, chunksize=chunksize))
+    with hash_pool(workers) as temporary:
+        return list(temporary.map(hash_one, plains, methods, chunksize=chunksize))
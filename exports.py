@@ -0,0 +1,160 @@
+"""
+Streaming exports of the session and clinical_note tables.
+
+Each dataset is one flat SELECT (with provider, patient and clinic names
+joined in) executed with ``yield_per``. Rows arrive from the database in
+partitions, through a server-side cursor where the driver supports one, and
+are encoded to CSV or NDJSON one partition at a time. Memory therefore stays
+flat however many rows match. Only plain column tuples are fetched, so
+nothing accumulates in the ORM identity map.
+"""
+import csv
+import io
+import json
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import select
+from sqlalchemy.orm import aliased
+
+from models import db, Account, Clinic, ClinicalNote, Provider, Recipient, Session
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+PARTITION_SIZE = 1000
+
+
+def _people():
+    return aliased(Account, name='doctor_account'), aliased(Account, name='patient_account')
+
+
+def _session_select():
+    doctor, patient = _people()
+    return (
+        select(
+            Session.session_id,
+            Session.unique_appointment_code,
+            Session.booked_timestamp,
+            Session.session_state,
+            Session.slot_id,
+            Clinic.clinic_title.label('clinic'),
+            Session.provider_id,
+            Provider.doctor_unique_id,
+            doctor.given_name.label('doctor_given_name'),
+            doctor.surname.label('doctor_surname'),
+            Session.recipient_id,
+            Recipient.patient_unique_id,
+            patient.given_name.label('patient_given_name'),
+            patient.surname.label('patient_surname'),
+        )
+        .select_from(Session)
+        .outerjoin(Provider, Session.provider_id == Provider.provider_id)
+        .outerjoin(doctor, Provider.provider_id == doctor.account_id)
+        .outerjoin(Clinic, Provider.clinic_id == Clinic.clinic_id)
+        .outerjoin(Recipient, Session.recipient_id == Recipient.recipient_id)
+        .outerjoin(patient, Recipient.recipient_id == patient.account_id)
+        .order_by(Session.session_id)
+    ), Session.booked_timestamp, Session.provider_id
+
+
+def _note_select():
+    doctor, patient = _people()
+    return (
+        select(
+            ClinicalNote.note_id,
+            ClinicalNote.session_id,
+            ClinicalNote.noted_on,
+            Clinic.clinic_title.label('clinic'),
+            ClinicalNote.provider_id,
+            Provider.doctor_unique_id,
+            doctor.given_name.label('doctor_given_name'),
+            doctor.surname.label('doctor_surname'),
+            ClinicalNote.recipient_id,
+            Recipient.patient_unique_id,
+            patient.given_name.label('patient_given_name'),
+            patient.surname.label('patient_surname'),
+            ClinicalNote.findings,
+            ClinicalNote.treatment_plan,
+        )
+        .select_from(ClinicalNote)
+        .outerjoin(Provider, ClinicalNote.provider_id == Provider.provider_id)
+        .outerjoin(doctor, Provider.provider_id == doctor.account_id)
+        .outerjoin(Clinic, Provider.clinic_id == Clinic.clinic_id)
+        .outerjoin(Recipient, ClinicalNote.recipient_id == Recipient.recipient_id)
+        .outerjoin(patient, Recipient.recipient_id == patient.account_id)
+        .order_by(ClinicalNote.note_id)
+    ), ClinicalNote.noted_on, ClinicalNote.provider_id
+
+
+DATASETS = {
+    'sessions': _session_select,
+    'notes': _note_select,
+}
+
+
+def export_statement(dataset, date_from=None, date_to=None, clinic_id=None,
+                     provider_id=None, status=None):
+    """
+    Build the SELECT for ``dataset`` ('sessions' or 'notes'). Dates are
+    inclusive days matched against the booking / note time; ``status`` only
+    applies to sessions.
+    """
+    if dataset not in DATASETS:
+        raise ValueError(f'Unknown dataset "{dataset}".')
+
+    stmt, timestamp, provider_column = DATASETS[dataset]()
+    if date_from:
+        stmt = stmt.where(timestamp >= date_from)
+    if date_to:
+        stmt = stmt.where(timestamp < date_to + timedelta(days=1))
+    if clinic_id:
+        stmt = stmt.where(Provider.clinic_id == clinic_id)
+    if provider_id:
+        stmt = stmt.where(provider_column == provider_id)
+    if status and dataset == 'sessions':
+        stmt = stmt.where(Session.session_state == status)
+    return stmt
+
+
+def _partitions(stmt):
+    result = db.session.execute(stmt.execution_options(yield_per=PARTITION_SIZE))
+    return result.keys(), result.partitions()
+
+
+def _plain(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def stream_csv(stmt):
+    """Yield the CSV header, then one chunk of text per partition of rows."""
+    columns, partitions = _partitions(stmt)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    yield buffer.getvalue()
+
+    for rows in partitions:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(rows)
+        yield buffer.getvalue()
+
+
+def stream_ndjson(stmt):
+    """Yield one chunk of newline-delimited JSON objects per partition of rows."""
+    columns, partitions = _partitions(stmt)
+    columns = list(columns)
+    for rows in partitions:
+        yield ''.join(
+            json.dumps(dict(zip(columns, map(_plain, row)))) + '\n'
+            for row in rows
+        )
+
+
+STREAMERS = {
+    'csv': stream_csv,
+    'ndjson': stream_ndjson,
+}
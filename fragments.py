@@ -0,0 +1,53 @@
+"""
+Jinja fragment caching.
+
+``{% cache 'sidebar', role, request.endpoint %} ... {% endcache %}`` renders
+its body once per distinct key and then serves the stored markup from
+``fragment_cache``. The key is the template name and line of the tag plus
+every expression listed, so it must name everything the body depends on.
+Fragments that use the current user should key on the role or name, not
+the account id, so that thousands of users share a handful of entries.
+
+The cache is per process and bounded by size and TTL like the other caches.
+It is bypassed while templates auto-reload (debug mode), so edits show up
+immediately.
+"""
+from jinja2 import nodes
+from jinja2.ext import Extension
+from markupsafe import Markup
+
+from caching import LRUCache
+
+fragment_cache = LRUCache('fragments', maxsize=2048, ttl=600)
+
+
+class FragmentCacheExtension(Extension):
+    """Adds the ``{% cache key, ... %}...{% endcache %}`` block tag."""
+
+    tags = {'cache'}
+
+    def __init__(self, environment):
+        super().__init__(environment)
+        environment.extend(fragment_cache_enabled=True)
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        parts = [nodes.Const(parser.name), nodes.Const(lineno), parser.parse_expression()]
+        while parser.stream.skip_if('comma'):
+            parts.append(parser.parse_expression())
+        body = parser.parse_statements(('name:endcache',), drop_needle=True)
+        return nodes.CallBlock(
+            self.call_method('_cached', [nodes.Tuple(parts, 'load')]), [], [], body
+        ).set_lineno(lineno)
+
+    def _cached(self, key, caller):
+        env = self.environment
+        if not env.fragment_cache_enabled or env.auto_reload:
+            return caller()
+        return fragment_cache.get_or_load(key, lambda: Markup(caller()))
+
+
+def init_app(app):
+    """Register the ``cache`` tag; FRAGMENT_CACHE=False renders every fragment afresh."""
+    app.jinja_env.add_extension(FragmentCacheExtension)
+    app.jinja_env.fragment_cache_enabled = app.config.get('FRAGMENT_CACHE', True)
@@ -0,0 +1,73 @@
+"""
+Flask-Login user loading backed by a short-lived identity cache.
+
+``load`` fetches an account together with its access level in one query and
+keeps a read-only ``CachedIdentity`` snapshot per account id for a few
+seconds. ``current_user.access_tier.tier_name`` is then a plain attribute, so
+the role decorators no longer trigger a second lazy-load query. Views that
+change an account must work on ``account_record()`` and call ``forget``
+after committing.
+"""
+from collections import namedtuple
+
+from flask_login import UserMixin, current_user
+
+from caching import LRUCache
+from models import db, Account, AccessLevel
+
+TierRef = namedtuple('TierRef', 'tier_id tier_name')
+
+identity_cache = LRUCache('identity', maxsize=4096, ttl=30)
+
+
+class CachedIdentity(UserMixin):
+    """Snapshot of an Account and its role, used as current_user."""
+
+    def __init__(self, account_id, email_address, given_name, surname,
+                 is_enabled, tier_id, tier_name):
+        self.account_id = account_id
+        self.email_address = email_address
+        self.given_name = given_name
+        self.surname = surname
+        self.is_enabled = is_enabled
+        self.tier_id = tier_id
+        self.access_tier = TierRef(tier_id, tier_name) if tier_id else None
+
+    def get_id(self):
+        return str(self.account_id)
+
+    @property
+    def full_name(self):
+        return f"{self.given_name or ''} {self.surname or ''}".strip()
+
+
+def _fetch(account_id):
+    row = db.session.query(
+        Account.account_id, Account.email_address, Account.given_name,
+        Account.surname, Account.is_enabled, AccessLevel.tier_id, AccessLevel.tier_name
+    ).outerjoin(
+        AccessLevel, Account.tier_id == AccessLevel.tier_id
+    ).filter(Account.account_id == account_id).first()
+    return CachedIdentity(*row) if row else None
+
+
+def load(account_id):
+    """Return the CachedIdentity for ``account_id`` (None if it does not exist)."""
+    identity = identity_cache.get(account_id)
+    if identity is None:
+        identity = _fetch(account_id)
+        if identity is not None:
+            identity_cache.set(account_id, identity)
+    return identity
+
+
+def forget(account_id):
+    """Drop a cached identity after its account, name, password or role changed."""
+    identity_cache.invalidate(account_id)
+
+
+def account_record():
+    """The ORM Account behind current_user, for views that modify it."""
+    if isinstance(current_user._get_current_object(), Account):
+        return current_user._get_current_object()
+    return Account.query.get(current_user.account_id)
@@ -0,0 +1,217 @@
+"""
+Bulk CSV import of patient and provider accounts.
+
+Rows are streamed from the file and handled in batches. Each batch costs one
+``IN`` query to find emails that are already registered, one parallel
+hashing pass, one multi-row ``INSERT ... RETURNING`` for the accounts, one
+executemany for the Provider/Recipient rows and one commit. Doctor IDs are
+reserved a block at a time per department code from the same sequences
+``Provider.generate_doctor_id`` uses, so imported and hand-made doctors share
+one numbering. Every rejected row is reported with its line number.
+
+Columns: ``email_address``, ``credential`` (required), ``given_name``,
+``surname``, ``clinic`` (department id or title; required for patients) and
+``expertise`` (providers only).
+"""
+import csv
+import io
+from collections import defaultdict, namedtuple
+
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+
+import counters
+import reference
+from credentials import hash_many, hash_pool, worker_count
+from models import db, Account, Provider, Recipient
+from sequences import allocate_block
+
+IMPORT_KINDS = ('patient', 'provider')
+REQUIRED_COLUMNS = ('email_address', 'credential')
+BATCH_SIZE = 500
+MIN_PASSWORD_LENGTH = 6
+
+RowError = namedtuple('RowError', 'line email_address message')
+
+
+class ImportReport:
+    """Outcome of one import: how many accounts were created and which rows failed."""
+
+    def __init__(self, kind):
+        self.kind = kind
+        self.created = 0
+        self.errors = []
+
+    @property
+    def rejected(self):
+        return len(self.errors)
+
+    def error_csv(self):
+        """The rejected rows as CSV text (line, email_address, message)."""
+        out = io.StringIO()
+        writer = csv.writer(out)
+        writer.writerow(RowError._fields)
+        writer.writerows(self.errors)
+        return out.getvalue()
+
+
+def _clinic_lookup():
+    lookup = {}
+    for clinic in reference.all_clinics():
+        lookup[str(clinic.clinic_id)] = clinic
+        lookup[clinic.clinic_title.strip().lower()] = clinic
+    return lookup
+
+
+def _parse_row(line, row, kind, clinics, seen):
+    """Return (parsed_dict, None) or (None, RowError) for one CSV row."""
+    email = (row.get('email_address') or '').strip()
+    password = row.get('credential') or ''
+
+    if not email or '@' not in email:
+        return None, RowError(line, email, 'missing or invalid email address')
+    if email in seen:
+        return None, RowError(line, email, 'email appears earlier in this file')
+    if len(password) < MIN_PASSWORD_LENGTH:
+        return None, RowError(line, email, f'password shorter than {MIN_PASSWORD_LENGTH} characters')
+
+    clinic_value = (row.get('clinic') or '').strip()
+    clinic = clinics.get(clinic_value.lower()) if clinic_value else None
+    if clinic_value and not clinic:
+        return None, RowError(line, email, f'unknown department "{clinic_value}"')
+    if kind == 'patient' and not clinic:
+        return None, RowError(line, email, 'patients need a department')
+
+    seen.add(email)
+    return {
+        'line': line,
+        'email_address': email,
+        'credential': password,
+        'given_name': (row.get('given_name') or '').strip() or None,
+        'surname': (row.get('surname') or '').strip() or None,
+        'clinic': clinic,
+        'expertise': (row.get('expertise') or '').strip() or None,
+    }, None
+
+
+def _doctor_ids(rows):
+    """Reserve one block of doctor IDs per department code for the batch."""
+    by_code = defaultdict(list)
+    for row in rows:
+        if row['clinic']:
+            by_code[row['clinic'].short_code].append(row)
+
+    for dept_code, members in by_code.items():
+        key, seed = Provider.doctor_id_sequence(dept_code)
+        for row, number in zip(members, allocate_block(key, len(members), seed=seed)):
+            row['doctor_unique_id'] = Provider.format_doctor_id(dept_code, number)
+
+
+def _insert_batch(batch, kind, report, pool, workers):
+    emails = [row['email_address'] for row in batch]
+    taken = set(db.session.scalars(
+        select(Account.email_address).where(Account.email_address.in_(emails))
+    ))
+    rows = []
+    for row in batch:
+        if row['email_address'] in taken:
+            report.errors.append(RowError(row['line'], row['email_address'], 'email already registered'))
+        else:
+            rows.append(row)
+    if not rows:
+        return
+
+    hashes = hash_many((row['credential'] for row in rows), pool=pool, workers=workers)
+    tier = reference.tier_id(kind)
+
+    try:
+        inserted = db.session.execute(
+            insert(Account).returning(Account.account_id, sort_by_parameter_order=True),
+            [{
+                'email_address': row['email_address'],
+                'credential_hash': hashed,
+                'given_name': row['given_name'],
+                'surname': row['surname'],
+                'tier_id': tier,
+            } for row, hashed in zip(rows, hashes)]
+        ).scalars().all()
+
+        if kind == 'provider':
+            _doctor_ids(rows)
+            profiles = [{
+                'provider_id': account_id,
+                'clinic_id': row['clinic'].clinic_id if row['clinic'] else None,
+                'expertise': row['expertise'],
+                'doctor_unique_id': row.get('doctor_unique_id'),
+            } for row, account_id in zip(rows, inserted)]
+            model = Provider
+        else:
+            profiles = [{
+                'recipient_id': account_id,
+                'clinic_id': row['clinic'].clinic_id,
+            } for row, account_id in zip(rows, inserted)]
+            model = Recipient
+
+        db.session.execute(insert(model), profiles)
+        # Bulk inserts skip the mapper events that maintain the dashboard counters
+        counters.adjust(model, len(profiles))
+        db.session.commit()
+    except IntegrityError:
+        # Most likely an email registered by someone else since the check above
+        db.session.rollback()
+        report.errors.extend(
+            RowError(row['line'], row['email_address'], 'batch rolled back by a conflicting change; retry these rows')
+            for row in rows
+        )
+        return
+
+    report.created += len(rows)
+
+
+def import_accounts(stream, kind, batch_size=BATCH_SIZE, workers=None):
+    """
+    Import accounts of ``kind`` ('patient' or 'provider') from the CSV text
+    ``stream``. Each batch commits on its own, so earlier batches stay
+    imported if a later one fails. ``workers`` hashing processes are used
+    (default: all cores); pass 1 to hash inline, as web requests do.
+    Returns an ImportReport.
+    """
+    if kind not in IMPORT_KINDS:
+        raise ValueError(f'Unknown account type "{kind}".')
+
+    reader = csv.DictReader(stream)
+    missing = [c for c in REQUIRED_COLUMNS if c not in (reader.fieldnames or ())]
+    if missing:
+        raise ValueError(f'CSV header is missing: {", ".join(missing)}.')
+
+    report = ImportReport(kind)
+    clinics = _clinic_lookup()
+    seen = set()
+    batch = []
+    pool = None
+    if worker_count(workers) > 1:
+        try:
+            pool = hash_pool(workers)
+        except (OSError, NotImplementedError):
+            # No process support here (e.g. AWS Lambda has no /dev/shm): hash inline
+            workers = 1
+
+    try:
+        for row in reader:
+            parsed, error = _parse_row(reader.line_num, row, kind, clinics, seen)
+            if error:
+                report.errors.append(error)
+                continue
+            batch.append(parsed)
+            if len(batch) >= batch_size:
+                _insert_batch(batch, kind, report, pool, workers)
+                batch = []
+        if batch:
+            _insert_batch(batch, kind, report, pool, workers)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    # Duplicate-email errors surface per batch; report everything in file order
+    report.errors.sort()
+    return report
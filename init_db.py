@@ -1,6 +1,7 @@
 from app import app
 from models import db, AccessLevel, Account, Clinic
 from werkzeug.security import generate_password_hash
+from migrations import upgrade
 
 
 def setup_database():
@@ -13,6 +14,9 @@ def setup_database():
         # Create all tables if they don't exist
         db.create_all()
 
+        # Apply any pending additive schema revisions
+        upgrade()
+
         # ---------------------------
         # Create access levels
         # ---------------------------
@@ -0,0 +1,45 @@
+"""
+Eager-loading query helpers for list views.
+
+Each helper returns a query with the relationships its templates read already
+joined in, so rendering N rows costs a fixed number of queries instead of one
+extra SELECT per row and relationship. The callers still own ordering,
+filtering and pagination.
+"""
+from sqlalchemy.orm import joinedload
+
+from models import ClinicalNote, Provider, Recipient, Session
+
+
+def provider_listing():
+    """Providers with their account and clinic loaded in the same query."""
+    return Provider.query.options(
+        joinedload(Provider.account_link),
+        joinedload(Provider.clinic_link)
+    )
+
+
+def recipient_listing():
+    """Recipients with their account and clinic loaded in the same query."""
+    return Recipient.query.options(
+        joinedload(Recipient.account_link),
+        joinedload(Recipient.clinic_link)
+    )
+
+
+def session_listing():
+    """Sessions with patient and provider accounts loaded in the same query."""
+    return Session.query.options(
+        joinedload(Session.recipient_link).joinedload(Recipient.account_link),
+        joinedload(Session.provider_link).joinedload(Provider.account_link)
+    )
+
+
+def note_listing(recipient_id):
+    """
+    One patient's clinical notes with the author loaded. The deferred note
+    bodies are left out; templates fetch them per note on expand.
+    """
+    return ClinicalNote.query.options(
+        joinedload(ClinicalNote.provider_link).joinedload(Provider.account_link)
+    ).filter(ClinicalNote.recipient_id == recipient_id)
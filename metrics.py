@@ -0,0 +1,207 @@
+"""
+In-process request instrumentation with Prometheus text exposition.
+
+``init_app`` hooks every request to record its latency per endpoint, its
+status code, and how many SQL statements it issued (and how long they took).
+``render`` turns the collected numbers, plus live SQLAlchemy pool stats, into
+the plain-text format Prometheus scrapes.
+"""
+import threading
+import time
+from collections import defaultdict
+
+from flask import g, has_app_context, request
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine
+
+from caching import CACHES
+
+# Latency buckets in seconds, query-count buckets in statements per request
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100)
+
+
+class Histogram:
+    """Cumulative-bucket histogram keyed by a label tuple."""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = defaultdict(lambda: [0] * (len(buckets) + 1))
+        self.sums = defaultdict(float)
+
+    def observe(self, labels, value):
+        counts = self.counts[labels]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                counts[i] += 1
+                break
+        else:
+            counts[-1] += 1
+        self.sums[labels] += value
+
+
+class Registry:
+    """All metrics collected by this process."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.request_latency = Histogram(LATENCY_BUCKETS)
+            self.request_queries = Histogram(QUERY_BUCKETS)
+            self.responses = defaultdict(int)
+            self.query_count = defaultdict(int)
+            self.query_seconds = defaultdict(float)
+
+    def record_request(self, endpoint, method, status, elapsed, queries, query_time):
+        with self.lock:
+            self.request_latency.observe((endpoint,), elapsed)
+            self.request_queries.observe((endpoint,), queries)
+            self.responses[(endpoint, method, str(status))] += 1
+            self.query_count[(endpoint,)] += queries
+            self.query_seconds[(endpoint,)] += query_time
+
+
+registry = Registry()
+
+
+# -------------------------------------------------------------
+# Request / Query Hooks
+# -------------------------------------------------------------
+def _before_request():
+    g.metrics_started = time.perf_counter()
+    g.metrics_queries = 0
+    g.metrics_query_time = 0.0
+
+
+def _after_request(response):
+    started = g.pop('metrics_started', None)
+    if started is not None:
+        registry.record_request(
+            request.endpoint or 'unmatched',
+            request.method,
+            response.status_code,
+            time.perf_counter() - started,
+            g.pop('metrics_queries', 0),
+            g.pop('metrics_query_time', 0.0)
+        )
+    return response
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('metrics_query_start', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get('metrics_query_start')
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+
+    # Statements issued outside a request (setup, CLI) are not attributed
+    if has_app_context() and 'metrics_queries' in g:
+        g.metrics_queries += 1
+        g.metrics_query_time += elapsed
+
+
+def init_app(app):
+    """Register request hooks on ``app`` and query hooks on every engine."""
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+
+    if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+
+
+# -------------------------------------------------------------
+# Probes and Exposition
+# -------------------------------------------------------------
+def probe_database(db):
+    """Run a trivial round trip and return its latency in seconds."""
+    started = time.perf_counter()
+    with db.engine.connect() as conn:
+        conn.execute(text('SELECT 1'))
+    return time.perf_counter() - started
+
+
+def pool_stats(db):
+    """Return connection pool gauges, skipping any the pool class lacks."""
+    pool = db.engine.pool
+    stats = {}
+    for name in ('size', 'checkedin', 'checkedout', 'overflow'):
+        reader = getattr(pool, name, None)
+        if callable(reader):
+            stats[name] = reader()
+    return stats
+
+
+def _labels(names, values):
+    pairs = ','.join(f'{n}="{v}"' for n, v in zip(names, values))
+    return '{' + pairs + '}' if pairs else ''
+
+
+def _render_histogram(lines, name, help_text, histogram, label_names):
+    lines.append(f'# HELP {name} {help_text}')
+    lines.append(f'# TYPE {name} histogram')
+    for labels, counts in sorted(histogram.counts.items()):
+        running = 0
+        for bound, count in zip(histogram.buckets + ('+Inf',), counts):
+            running += count
+            bucket_labels = _labels(label_names + ('le',), labels + (bound,))
+            lines.append(f'{name}_bucket{bucket_labels} {running}')
+        base = _labels(label_names, labels)
+        lines.append(f'{name}_sum{base} {histogram.sums[labels]:.6f}')
+        lines.append(f'{name}_count{base} {running}')
+
+
+def render(db):
+    """Return every metric in Prometheus text exposition format."""
+    import admission  # only the exposition reads its counters
+    lines = []
+    with registry.lock:
+        _render_histogram(
+            lines, 'hms_request_duration_seconds',
+            'Request latency by endpoint.',
+            registry.request_latency, ('endpoint',)
+        )
+        _render_histogram(
+            lines, 'hms_request_db_queries',
+            'SQL statements issued per request by endpoint.',
+            registry.request_queries, ('endpoint',)
+        )
+
+        lines.append('# HELP hms_responses_total Responses by endpoint, method and status code.')
+        lines.append('# TYPE hms_responses_total counter')
+        for labels, value in sorted(registry.responses.items()):
+            lines.append(f'hms_responses_total{_labels(("endpoint", "method", "status"), labels)} {value}')
+
+        lines.append('# HELP hms_db_queries_total SQL statements issued by endpoint.')
+        lines.append('# TYPE hms_db_queries_total counter')
+        for labels, value in sorted(registry.query_count.items()):
+            lines.append(f'hms_db_queries_total{_labels(("endpoint",), labels)} {value}')
+
+        lines.append('# HELP hms_db_query_seconds_total Time spent in SQL by endpoint.')
+        lines.append('# TYPE hms_db_query_seconds_total counter')
+        for labels, value in sorted(registry.query_seconds.items()):
+            lines.append(f'hms_db_query_seconds_total{_labels(("endpoint",), labels)} {value:.6f}')
+
+    for stat in ('size', 'hits', 'misses', 'evictions'):
+        kind = 'gauge' if stat == 'size' else 'counter'
+        suffix = '' if stat == 'size' else '_total'
+        lines.append(f'# TYPE hms_cache_{stat}{suffix} {kind}')
+        for name, cache in sorted(CACHES.items()):
+            lines.append(f'hms_cache_{stat}{suffix}{{cache="{name}"}} {cache.stats()[stat]}')
+
+    lines.append('# HELP hms_admission_rejected_total Sign-in/sign-up requests turned away by reason.')
+    lines.append('# TYPE hms_admission_rejected_total counter')
+    for reason, value in sorted(admission.rejections.items()):
+        lines.append(f'hms_admission_rejected_total{{reason="{reason}"}} {value}')
+
+    for name, value in pool_stats(db).items():
+        lines.append(f'# TYPE hms_db_pool_{name} gauge')
+        lines.append(f'hms_db_pool_{name} {value}')
+
+    return '\n'.join(lines) + '\n'
@@ -1,14 +1,20 @@
 #!/usr/bin/env python
 """
-Database migration script to recreate the database with the new schema.
+Database migration script.
+
+By default this applies pending schema revisions from ``migrations.py`` to the
+existing database without dropping any data. Use ``--status`` to list
+revisions, ``--verify`` to check that every declared index exists, and
+``--reset`` to fall back to the old behaviour of recreating the database.
 """
 import os
-import shutil
+import sys
 
-def migrate_database():
+
+def reset_database():
     """Delete and recreate the database with new schema."""
     db_path = 'instance/app.db'
-    
+
     print("Step 1: Removing old database...")
     if os.path.exists(db_path):
         try:
@@ -16,28 +22,88 @@ def migrate_database():
             print(f"  ✓ Removed {db_path}")
         except Exception as e:
             print(f"  ! Could not remove file: {e}")
-    
+
     print("\nStep 2: Importing app and models...")
     from app import app
     from models import db
-    
+    from migrations import upgrade
+
     print("\nStep 3: Creating new database with updated schema...")
     with app.app_context():
         db.create_all()
+        upgrade()
         print("  ✓ All tables created")
-    
+
     print("\nStep 4: Populating initial data...")
     from init_db import setup_database
     setup_database()
-    
+
     print("\n" + "="*50)
-    print("✓ Database migration completed successfully!")
+    print("✓ Database reset completed successfully!")
     print("="*50)
 
+
+def migrate_database():
+    """Apply pending revisions in place and verify the hot-path indexes."""
+    from app import app
+    from models import db
+    from migrations import upgrade, verify_indexes
+
+    with app.app_context():
+        # Creates any brand new tables; existing tables are left untouched
+        db.create_all()
+
+        applied = upgrade()
+        if applied:
+            for revision_id in applied:
+                print(f"  ✓ Applied {revision_id}")
+        else:
+            print("  ✓ Database already at latest revision")
+
+        missing = verify_indexes()
+        for table, index_name in missing:
+            print(f"  ! Missing index {index_name} on {table}")
+        return not missing
+
+
+def show_status():
+    """Print every known revision and whether it has been applied."""
+    from app import app
+    from migrations import REVISIONS, applied_revisions
+
+    with app.app_context():
+        done = applied_revisions()
+        for revision_id, description, _ in sorted(REVISIONS):
+            mark = "✓" if revision_id in done else " "
+            print(f"  [{mark}] {revision_id}  {description}")
+
+
+def verify_database():
+    """Report declared indexes that are missing from the database."""
+    from app import app
+    from migrations import verify_indexes
+
+    with app.app_context():
+        missing = verify_indexes()
+        for table, index_name in missing:
+            print(f"  ! Missing index {index_name} on {table}")
+        if not missing:
+            print("  ✓ All declared indexes present")
+        return not missing
+
+
 if __name__ == '__main__':
     try:
-        migrate_database()
+        if '--reset' in sys.argv:
+            reset_database()
+        elif '--status' in sys.argv:
+            show_status()
+        elif '--verify' in sys.argv:
+            sys.exit(0 if verify_database() else 1)
+        else:
+            sys.exit(0 if migrate_database() else 1)
     except Exception as e:
         print(f"\n✗ Migration failed: {str(e)}")
         import traceback
         traceback.print_exc()
+        sys.exit(1)
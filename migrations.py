@@ -0,0 +1,226 @@
+"""
+Versioned, additive schema migrations.
+
+Every revision below runs at most once per database and is recorded in the
+``schema_revision`` table, so upgrading never drops ``instance/app.db``.
+Revisions must be additive (new tables, columns or indexes) and safe to
+re-run against a database that ``db.create_all()`` already brought up to date.
+"""
+import sys
+
+from sqlalchemy import func, inspect, select, text, update
+from sqlalchemy.exc import IntegrityError
+
+from models import (
+    db, Provider, Recipient, TimeSlot,
+    Session, ClinicalNote, SchemaRevision, EntityCounter, IdSequence
+)
+import conditional
+import counters
+import note_search
+
+# Ordered list of (revision_id, description, apply_fn)
+REVISIONS = []
+
+
+def revision(revision_id, description):
+    """Register a migration function under a unique, sortable revision id."""
+    def register(fn):
+        REVISIONS.append((revision_id, description, fn))
+        return fn
+    return register
+
+
+# -------------------------------------------------------------
+# Helpers
+# -------------------------------------------------------------
+def column_exists(table, column):
+    """Check if a column exists on a table in the bound database."""
+    columns = inspect(db.engine).get_columns(table)
+    return column in [c["name"] for c in columns]
+
+
+def add_column_if_missing(table, column, ddl):
+    """Add a nullable column with plain DDL unless it is already present."""
+    if column_exists(table, column):
+        return False
+
+    with db.engine.begin() as conn:
+        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+    return True
+
+
+def create_indexes(model, *names):
+    """
+    Create the named indexes declared in ``model.__table_args__`` unless they
+    already exist. Each revision names the indexes it introduces, so indexes
+    declared later are left to the revision that adds them.
+    """
+    declared = {index.name: index for index in model.__table__.indexes}
+    unknown = [name for name in names if name not in declared]
+    if unknown:
+        raise KeyError(f"{model.__tablename__} declares no index named {', '.join(unknown)}")
+
+    existing = existing_indexes(model.__tablename__)
+    created = []
+    for name in names:
+        if name not in existing:
+            declared[name].create(bind=db.engine)
+            created.append(name)
+    return created
+
+
+def cancel_duplicate_bookings():
+    """
+    Older code could book one slot twice. Keep the earliest live session on
+    each slot and cancel the rest, so the one-live-session-per-slot index can
+    be built. Commits, and returns {slot_id: [cancelled session_ids]}.
+    """
+    live = Session.session_state != 'cancelled'
+    contested = (
+        select(Session.slot_id)
+        .where(live, Session.slot_id.isnot(None))
+        .group_by(Session.slot_id)
+        .having(func.count() > 1)
+    )
+    rows = db.session.execute(
+        select(Session.slot_id, Session.session_id)
+        .where(live, Session.slot_id.in_(contested))
+        .order_by(Session.slot_id, Session.booked_timestamp, Session.session_id)
+    ).all()
+
+    cancelled = {}
+    for slot_id, session_id in rows:
+        if slot_id in cancelled:
+            cancelled[slot_id].append(session_id)
+        else:
+            cancelled[slot_id] = []  # the earliest booking keeps the slot
+    losers = [sid for sids in cancelled.values() for sid in sids]
+    if losers:
+        db.session.execute(
+            update(Session).where(Session.session_id.in_(losers)).values(session_state='cancelled')
+        )
+    # The index is built on another connection; SQLite needs this write released first
+    db.session.commit()
+    return {slot_id: sids for slot_id, sids in cancelled.items() if sids}
+
+
+def existing_indexes(table):
+    """Return the names of the indexes currently present on a table."""
+    return {ix["name"] for ix in inspect(db.engine).get_indexes(table)}
+
+
+# -------------------------------------------------------------
+# Revisions
+# -------------------------------------------------------------
+@revision("0001_unique_id_columns", "Add doctor/patient/appointment ID columns")
+def add_unique_id_columns():
+    # Replaces scripts/add_column.py and scripts/add_id_columns.py
+    add_column_if_missing("provider", "doctor_unique_id", "VARCHAR(32)")
+    add_column_if_missing("recipient", "patient_unique_id", "VARCHAR(32)")
+    add_column_if_missing("recipient", "appointment_date", "DATE")
+    add_column_if_missing("session", "unique_appointment_code", "VARCHAR(32)")
+
+
+@revision("0002_hot_path_indexes", "Composite indexes for session, slot and note lookups")
+def add_hot_path_indexes():
+    create_indexes(Session, "ix_session_provider_booked", "ix_session_recipient_state", "ix_session_booked")
+    create_indexes(TimeSlot, "ix_time_slot_provider_open")
+    create_indexes(ClinicalNote, "ix_clinical_note_recipient_noted")
+
+
+@revision("0003_admin_filter_indexes", "Indexes for admin list filters and keyset paging")
+def add_admin_filter_indexes():
+    create_indexes(Provider, "ix_provider_clinic")
+    create_indexes(Recipient, "ix_recipient_clinic_date")
+    create_indexes(Session, "ix_session_state_booked")
+
+
+@revision("0004_entity_counters", "Seed dashboard counters from current row counts")
+def seed_entity_counters():
+    EntityCounter.__table__.create(bind=db.engine, checkfirst=True)
+    counters.recount()
+
+
+@revision("0005_id_sequences", "Per-key counters for doctor, patient and appointment IDs")
+def add_id_sequences():
+    # Counters seed themselves lazily from existing IDs on first use
+    IdSequence.__table__.create(bind=db.engine, checkfirst=True)
+
+
+@revision("0006_unique_active_slot", "Partial unique index: one live session per slot")
+def add_unique_active_slot():
+    if "uq_session_active_slot" not in existing_indexes("session"):
+        for slot_id, session_ids in cancel_duplicate_bookings().items():
+            print(f"0006: slot {slot_id} was double-booked; cancelled session(s) "
+                  f"{', '.join(map(str, session_ids))}", file=sys.stderr)
+    create_indexes(Session, "uq_session_active_slot")
+
+
+@revision("0007_open_slot_start_index", "Index open slots by start time for next-available search")
+def add_open_slot_start_index():
+    create_indexes(TimeSlot, "ix_time_slot_open_start")
+
+
+@revision("0008_clinical_note_search", "Full-text index over clinical note findings and plans")
+def add_clinical_note_search():
+    note_search.install()
+
+
+@revision("0009_data_versions", "Per-table versions for ETag / Last-Modified validators")
+def add_data_versions():
+    conditional.version_table.create(bind=db.engine, checkfirst=True)
+    conditional.seed()
+
+
+# -------------------------------------------------------------
+# Runner
+# -------------------------------------------------------------
+def applied_revisions():
+    """Return the set of revision ids already recorded in the database."""
+    SchemaRevision.__table__.create(bind=db.engine, checkfirst=True)
+    return {row.revision_id for row in SchemaRevision.query.all()}
+
+
+def head_revision():
+    """Id of the newest registered revision."""
+    return max(REVISIONS)[0]
+
+
+def pending_revisions():
+    """Return registered revisions that have not been applied yet."""
+    done = applied_revisions()
+    return [rev for rev in sorted(REVISIONS) if rev[0] not in done]
+
+
+def upgrade():
+    """
+    Apply every pending revision in order and record it.
+    Must be called inside an application context. Returns the ids applied.
+    """
+    applied = []
+    for revision_id, description, apply_fn in pending_revisions():
+        apply_fn()
+        db.session.add(SchemaRevision(revision_id=revision_id, description=description))
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # Another worker recorded the same revision concurrently
+            db.session.rollback()
+            continue
+        applied.append(revision_id)
+    return applied
+
+
+def verify_indexes():
+    """
+    Compare the indexes declared on the models with the live database.
+    Returns a list of (table, index_name) pairs that are missing.
+    """
+    missing = []
+    for model in (Provider, Recipient, TimeSlot, Session, ClinicalNote):
+        existing = existing_indexes(model.__tablename__)
+        for index in model.__table__.indexes:
+            if index.name not in existing:
+                missing.append((model.__tablename__, index.name))
+    return missing
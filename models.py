@@ -74,6 +74,11 @@ class Account(db.Model, UserMixin):
 # -------------------------------------------------------------
 # Clinic / Department Model
 # -------------------------------------------------------------
+def department_code(clinic_title):
+    """Department initials used in doctor and patient IDs (max 4 chars)."""
+    return ''.join(word[0].upper() for word in clinic_title.split() if word)[:4]
+
+
 class Clinic(db.Model):
     __tablename__ = "clinic"
 
@@ -81,6 +86,11 @@ class Clinic(db.Model):
     clinic_title = db.Column(db.String(120), unique=True, nullable=False)
     clinic_notes = db.Column(db.Text)
 
+    @property
+    def short_code(self):
+        """Department initials used in doctor and patient IDs (max 4 chars)."""
+        return department_code(self.clinic_title)
+
     def persist(self):
         db.session.add(self)
         db.session.commit()
@@ -104,6 +114,10 @@ class Provider(db.Model):
     )
     clinic_link = db.relationship("Clinic")
 
+    __table_args__ = (
+        db.Index("ix_provider_clinic", "clinic_id"),
+    )
+
     @property
     def display_name(self):
         return self.account_link.full_name
@@ -112,27 +126,39 @@ class Provider(db.Model):
         """
         Generate a unique doctor ID based on department.
         Format: DEPT-NNN where DEPT is clinic initials and NNN is sequence number.
-        Example: CARD-001 for Cardiology, first doctor in that department.
+        Example: C-001 for Cardiology, first doctor with that department code.
+        Numbers come from an atomic per-code counter (see sequences.py), so
+        departments sharing initials never hand out the same ID.
         """
         if not self.clinic_id:
             return None
-        
-        clinic = self.clinic_link
+
+        clinic = self.clinic_link or Clinic.query.get(self.clinic_id)
         if not clinic:
             return None
-        
-        # Extract department initials (first 3-4 chars, uppercase)
-        dept_code = ''.join(word[0].upper() for word in clinic.clinic_title.split() if word)
-        dept_code = dept_code[:4]  # Limit to 4 chars
-        
-        # Count doctors in this clinic before this one
-        count_in_clinic = Provider.query.filter_by(clinic_id=self.clinic_id).count()
-        sequence = str(count_in_clinic + 1).zfill(3)
-        
-        unique_id = f"{dept_code}-{sequence}"
+
+        from sequences import allocate
+
+        dept_code = clinic.short_code
+        key, seed = Provider.doctor_id_sequence(dept_code)
+        unique_id = Provider.format_doctor_id(dept_code, allocate(key, seed=seed))
         self.doctor_unique_id = unique_id
         return unique_id
 
+    @staticmethod
+    def doctor_id_sequence(dept_code):
+        """Sequence key and first-use seed shared by every doctor ID for a code."""
+        from sequences import highest_suffix
+
+        return (
+            f"doctor:{dept_code}",
+            lambda: highest_suffix(Provider.doctor_unique_id, f"{dept_code}-")
+        )
+
+    @staticmethod
+    def format_doctor_id(dept_code, number):
+        return f"{dept_code}-{str(number).zfill(3)}"
+
 
 # -------------------------------------------------------------
 # Recipient Model (Patients)
@@ -151,40 +177,40 @@ class Recipient(db.Model):
     )
     clinic_link = db.relationship("Clinic")
 
+    # Clinic filters and per-day patient numbering
+    __table_args__ = (
+        db.Index("ix_recipient_clinic_date", "clinic_id", "appointment_date"),
+    )
+
     def generate_patient_id(self, appointment_date=None):
         """
         Generate a unique patient ID based on appointment date and department.
         Format: DEPT-DDMMYY-NNN where DEPT is clinic code, DDMMYY is appointment date,
-        and NNN is sequence number for that clinic on that date.
-        Example: CARD-290125-001 for Cardiology, Jan 29, 2025, first patient.
+        and NNN is sequence number for that clinic code on that date.
+        Example: C-290125-001 for Cardiology, Jan 29, 2025, first patient.
         """
         if not self.clinic_id or not appointment_date:
             return None
-        
-        clinic = self.clinic_link
+
+        clinic = self.clinic_link or Clinic.query.get(self.clinic_id)
         if not clinic:
             return None
-        
-        # Extract department initials (first 3-4 chars, uppercase)
-        dept_code = ''.join(word[0].upper() for word in clinic.clinic_title.split() if word)
-        dept_code = dept_code[:4]
-        
+
+        from sequences import allocate, highest_suffix
+
+        dept_code = clinic.short_code
+
         # Format date as DDMMYY
         date_str = appointment_date.strftime("%d%m%y")
-        
-        # Count patients for this clinic on this date
-        from datetime import date as date_type
-        if isinstance(appointment_date, date_type):
-            count_on_date = Recipient.query.filter(
-                Recipient.clinic_id == self.clinic_id,
-                Recipient.appointment_date == appointment_date
-            ).count()
-        else:
-            count_on_date = 0
-        
-        sequence = str(count_on_date + 1).zfill(3)
-        
-        unique_id = f"{dept_code}-{date_str}-{sequence}"
+
+        prefix = f"{dept_code}-{date_str}-"
+        number = allocate(
+            f"patient:{dept_code}:{date_str}",
+            seed=lambda: highest_suffix(Recipient.patient_unique_id, prefix)
+        )
+        sequence = str(number).zfill(3)
+
+        unique_id = f"{prefix}{sequence}"
         self.patient_unique_id = unique_id
         self.appointment_date = appointment_date
         return unique_id
@@ -207,6 +233,13 @@ class TimeSlot(db.Model):
         backref=db.backref("time_slots", lazy="dynamic")
     )
 
+    # Open-slot lookups always filter by provider and availability
+    __table_args__ = (
+        db.Index("ix_time_slot_provider_open", "provider_id", "slot_available", "starts_at"),
+        # Clinic-wide "next available" scans open slots in start order
+        db.Index("ix_time_slot_open_start", "slot_available", "starts_at"),
+    )
+
     def persist(self):
         db.session.add(self)
         db.session.commit()
@@ -231,23 +264,44 @@ class Session(db.Model):
     recipient_link = db.relationship("Recipient")
     provider_link = db.relationship("Provider")
 
+    # Provider, patient and admin views each filter on one of these paths
+    __table_args__ = (
+        db.Index("ix_session_provider_booked", "provider_id", "booked_timestamp"),
+        db.Index("ix_session_recipient_state", "recipient_id", "session_state"),
+        db.Index("ix_session_booked", "booked_timestamp"),
+        db.Index("ix_session_state_booked", "session_state", "booked_timestamp"),
+        # A slot can back at most one non-cancelled session
+        db.Index(
+            "uq_session_active_slot", "slot_id", unique=True,
+            sqlite_where=db.text("session_state != 'cancelled'"),
+            postgresql_where=db.text("session_state != 'cancelled'")
+        ),
+    )
+
     def generate_appointment_code(self):
         """Generate unique appointment code based on department, date, and patient."""
+        from sequences import allocate
+
         # Get clinic from recipient
-        clinic = self.recipient_link.clinic_link
+        recipient = self.recipient_link or Recipient.query.get(self.recipient_id)
+        clinic = recipient.clinic_link if recipient else None
         clinic_code = str(clinic.clinic_id).zfill(2) if clinic else "00"
-        
+
         # Get date in format DDMM
         appointment_date = self.booked_timestamp.strftime("%d%m")
-        
+
         # Get patient ID with padding
         patient_code = str(self.recipient_id).zfill(5)
-        
+
         # Get appointment time in format HHMM
         time_code = self.booked_timestamp.strftime("%H%M")
-        
-        # Combine into unique code: CLINIC-DDMM-PATIENT-HHMM
-        unique_code = f"APT{clinic_code}{appointment_date}{patient_code}{time_code}"
+
+        # Per-clinic, per-day counter keeps codes unique even for the same patient and minute
+        day_key = self.booked_timestamp.strftime("%Y%m%d")
+        sequence = str(allocate(f"appointment:{clinic_code}:{day_key}")).zfill(3)
+
+        # Combine into unique code: CLINIC-DDMM-PATIENT-HHMM-SEQ
+        unique_code = f"APT{clinic_code}{appointment_date}{patient_code}{time_code}{sequence}"
         self.unique_appointment_code = unique_code
         return unique_code
 
@@ -267,10 +321,61 @@ class ClinicalNote(db.Model):
     recipient_id = db.Column(db.Integer, db.ForeignKey("recipient.recipient_id"))
     provider_id = db.Column(db.Integer, db.ForeignKey("provider.provider_id"))
 
-    findings = db.Column(db.Text)
-    treatment_plan = db.Column(db.Text)
+    # Bodies can be long: history lists load metadata only and the two
+    # columns are fetched together the first time either is read
+    findings = db.deferred(db.Column(db.Text), group="note_body")
+    treatment_plan = db.deferred(db.Column(db.Text), group="note_body")
     noted_on = db.Column(db.DateTime, default=datetime.utcnow)
 
+    provider_link = db.relationship("Provider")
+
+    # Treatment history is always read per patient, newest first
+    __table_args__ = (
+        db.Index("ix_clinical_note_recipient_noted", "recipient_id", "noted_on"),
+    )
+
     def persist(self):
         db.session.add(self)
         db.session.commit()
+
+
+# -------------------------------------------------------------
+# Schema Revision Model (applied migrations)
+# -------------------------------------------------------------
+class SchemaRevision(db.Model):
+    __tablename__ = "schema_revision"
+
+    revision_id = db.Column(db.String(64), primary_key=True)
+    description = db.Column(db.String(255))
+    applied_on = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+# -------------------------------------------------------------
+# Entity Counter Model (dashboard totals)
+# -------------------------------------------------------------
+class EntityCounter(db.Model):
+    __tablename__ = "entity_counter"
+
+    counter_name = db.Column(db.String(40), primary_key=True)
+    counter_value = db.Column(db.Integer, nullable=False, default=0)
+
+
+# -------------------------------------------------------------
+# ID Sequence Model (doctor / patient / appointment numbering)
+# -------------------------------------------------------------
+class IdSequence(db.Model):
+    __tablename__ = "id_sequence"
+
+    sequence_key = db.Column(db.String(64), primary_key=True)
+    last_value = db.Column(db.Integer, nullable=False, default=0)
+
+
+# -------------------------------------------------------------
+# Data Version Model (HTTP validators for read-mostly pages)
+# -------------------------------------------------------------
+class DataVersion(db.Model):
+    __tablename__ = "data_version"
+
+    table_name = db.Column(db.String(40), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=1)
+    changed_on = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
@@ -1,5 +1,7 @@
 import sys
 import os
+import base64
+import gzip
 from io import BytesIO
 import json
 
@@ -12,17 +14,137 @@ os.environ.setdefault('FLASK_ENV', 'production')
 try:
     from app import app, db, orchestrate_initial_setup
     
-    # Initialize database on cold start
-    with app.app_context():
-        db.create_all()
-        try:
-            orchestrate_initial_setup()
-        except Exception as e:
-            print(f"Setup initialization error: {e}", file=sys.stderr)
+    # Initialize database on cold start; a current database costs one query
+    try:
+        orchestrate_initial_setup()
+    except Exception as e:
+        print(f"Setup initialization error: {e}", file=sys.stderr)
 except ImportError as e:
     print(f"Error importing app: {e}", file=sys.stderr)
     raise
 
+# Bodies smaller than this are sent as-is; compressing them rarely pays off
+MIN_COMPRESS_BYTES = 1024
+
+# Media types sent as text, and therefore worth compressing
+TEXT_TYPES = ('text/', 'application/json', 'application/javascript',
+              'application/xml', 'application/x-ndjson', 'image/svg+xml')
+
+try:
+    import brotli
+except ImportError:  # optional: gzip is always available
+    brotli = None
+
+
+def _header(headers, name):
+    """Case-insensitive lookup in an event's header dict."""
+    for key, value in (headers or {}).items():
+        if key.lower() == name:
+            return value
+    return ''
+
+
+def client_ip(headers):
+    """
+    The caller's address as Netlify reports it: x-nf-client-connection-ip,
+    then client-ip, then the first hop of x-forwarded-for. Empty if none is set.
+    """
+    for name in ('x-nf-client-connection-ip', 'client-ip'):
+        value = _header(headers, name).strip()
+        if value:
+            return value
+    return _header(headers, 'x-forwarded-for').split(',')[0].strip()
+
+
+def negotiate_encoding(accept_encoding):
+    """
+    Pick 'br' or 'gzip' from an Accept-Encoding header, honouring q-values
+    (q=0 refuses a coding). Returns None when neither is acceptable.
+    """
+    offered = {}
+    for part in (accept_encoding or '').split(','):
+        coding, _, params = part.strip().partition(';')
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        offered[coding.strip().lower()] = quality
+
+    wildcard = offered.get('*', 0.0)
+    candidates = (['br'] if brotli else []) + ['gzip']
+    best = max(candidates, key=lambda c: offered.get(c, wildcard))
+    return best if offered.get(best, wildcard) > 0 else None
+
+
+def compress(body, coding):
+    if coding == 'br':
+        return brotli.compress(body, quality=5)
+    return gzip.compress(body, compresslevel=6, mtime=0)
+
+
+def build_response(status_code, headers_list, body, accept_encoding='', method='GET'):
+    """
+    Turn a WSGI status, header list and body into a Netlify response.
+    Text bodies are compressed when the client accepts it. Compressed and
+    binary bodies are base64 encoded instead of being decoded as UTF-8.
+    Repeated headers such as Set-Cookie go into multiValueHeaders.
+    """
+    content_type = ''
+    already_encoded = False
+    for name, value in headers_list:
+        lowered = name.lower()
+        if lowered == 'content-type':
+            content_type = value.lower()
+        elif lowered == 'content-encoding':
+            already_encoded = True
+
+    is_text = content_type.startswith(TEXT_TYPES)
+    coding = None
+    if (is_text and not already_encoded and len(body) >= MIN_COMPRESS_BYTES
+            and method != 'HEAD' and status_code not in (204, 304)):
+        coding = negotiate_encoding(accept_encoding)
+
+    if coding:
+        body = compress(body, coding)
+
+    multi = {}
+    for name, value in headers_list:
+        if name.lower() == 'content-length':
+            value = str(len(body))
+        multi.setdefault(name, []).append(value)
+    if coding:
+        multi['Content-Encoding'] = [coding]
+    if is_text:
+        # Text responses differ by Accept-Encoding even when sent uncompressed
+        vary_name = next((n for n in multi if n.lower() == 'vary'), 'Vary')
+        vary = ', '.join(multi.get(vary_name, []))
+        if 'accept-encoding' not in vary.lower():
+            multi[vary_name] = [f'{vary}, Accept-Encoding' if vary else 'Accept-Encoding']
+
+    encoded = bool(coding) or (bool(body) and not is_text)
+    if not encoded:
+        try:
+            text_body = body.decode('utf-8')
+        except UnicodeDecodeError:
+            encoded = True
+    if encoded:
+        text_body = base64.b64encode(body).decode('ascii')
+
+    response = {
+        'statusCode': status_code,
+        'headers': {name: values[-1] for name, values in multi.items() if len(values) == 1},
+        'body': text_body,
+        'isBase64Encoded': encoded,
+    }
+    repeated = {name: values for name, values in multi.items() if len(values) > 1}
+    if repeated:
+        response['multiValueHeaders'] = repeated
+    return response
+
+
 def handler(event, context):
     """
     Netlify Functions handler for Flask app.
@@ -39,7 +161,6 @@ def handler(event, context):
         # Handle base64 encoded body
         is_base64 = event.get('isBase64Encoded', False)
         if is_base64 and body:
-            import base64
             body = base64.b64decode(body)
         elif isinstance(body, str):
             body = body.encode('utf-8')
@@ -70,6 +191,12 @@ def handler(event, context):
             'wsgi.multiprocess': False,
             'wsgi.run_once': False,
         }
+
+        # Rate limits key on the client address; without it every caller
+        # would share one bucket
+        remote_addr = client_ip(headers)
+        if remote_addr:
+            environ['REMOTE_ADDR'] = remote_addr
         
         # Add headers to environ
         for header_name, header_value in headers.items():
@@ -79,8 +206,8 @@ def handler(event, context):
         
         # Capture response
         response_status = None
-        response_headers = {}
-        
+        response_headers = []
+
         def start_response(status, headers_list, exc_info=None):
             nonlocal response_status, response_headers
             if exc_info:
@@ -90,17 +217,18 @@ def handler(event, context):
                 finally:
                     exc_info = None
             response_status = status
-            response_headers = dict(headers_list)
+            response_headers = headers_list
             return lambda x: None  # write() function for legacy apps
-        
+
         # Call Flask app
         try:
             response_data = app(environ, start_response)
-            response_body = b''.join(response_data)
-            
-            # Close response if it has a close method
-            if hasattr(response_data, 'close'):
-                response_data.close()
+            try:
+                chunks = list(response_data)
+            finally:
+                # Close response if it has a close method
+                if hasattr(response_data, 'close'):
+                    response_data.close()
         except Exception as e:
             print(f"Flask app error: {e}", file=sys.stderr)
             import traceback
@@ -110,31 +238,21 @@ def handler(event, context):
                 'headers': {'Content-Type': 'text/plain'},
                 'body': f'Internal Server Error: {str(e)}'
             }
-        
+
         # Extract status code
         status_code = int(response_status.split()[0]) if response_status else 500
-        
-        # Prepare response headers
-        headers_dict = {}
-        for k, v in response_headers.items():
-            headers_dict[k] = v
-        
-        # Determine if response should be base64 encoded
-        is_binary = False
-        content_type = headers_dict.get('Content-Type', '')
-        if any(x in content_type for x in ['image', 'audio', 'video', 'application/octet-stream']):
-            is_binary = True
-        
-        # Format response
-        response_body_str = response_body.decode('utf-8', errors='ignore') if response_body else ''
-        
-        return {
-            'statusCode': status_code,
-            'headers': headers_dict,
-            'body': response_body_str,
-            'isBase64Encoded': False
-        }
-        
+
+        # Flask normally yields a single chunk; only join when there are several
+        response_body = chunks[0] if len(chunks) == 1 else b''.join(chunks)
+
+        return build_response(
+            status_code,
+            response_headers,
+            response_body,
+            accept_encoding=_header(headers, 'accept-encoding'),
+            method=http_method
+        )
+
     except Exception as e:
         print(f"Handler error: {e}", file=sys.stderr)
         import traceback
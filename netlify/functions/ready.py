@@ -0,0 +1,29 @@
+import sys
+import os
+import json
+
+# Add parent directory to path so we can import the app
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from app import app, db
+import metrics
+
+
+def handler(event, context):
+    """Readiness probe: reports database round-trip latency."""
+    try:
+        with app.app_context():
+            latency = metrics.probe_database(db)
+    except Exception as e:
+        print(f"Readiness probe failed: {e}", file=sys.stderr)
+        return {
+            'statusCode': 503,
+            'headers': {'Content-Type': 'application/json'},
+            'body': json.dumps({'status': 'unavailable'})
+        }
+
+    return {
+        'statusCode': 200,
+        'headers': {'Content-Type': 'application/json'},
+        'body': json.dumps({'status': 'ready', 'db_latency_ms': round(latency * 1000, 3)})
+    }
@@ -0,0 +1,171 @@
+"""
+Full-text search over clinical notes.
+
+On SQLite the findings and treatment plan are indexed by an FTS5
+external-content table, ``clinical_note_fts``. Triggers on
+``clinical_note`` keep it in sync, so every insert, update or delete
+(including bulk ones) is reflected without application code. Results are
+ranked with bm25, with findings weighted above the plan. On PostgreSQL a
+GIN index over the same ``to_tsvector`` expression the query uses plays the
+same role, ranked with ts_rank_cd. Other databases, or a SQLite build
+without FTS5, fall back to LIKE matching, newest first.
+
+``install`` is idempotent and is applied by migration 0008.
+"""
+import re
+from collections import namedtuple
+
+from markupsafe import Markup, escape
+from sqlalchemy import and_, column, func, inspect, literal_column, or_, table, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import undefer_group
+
+from models import db, Account, ClinicalNote
+
+MAX_RESULTS = 50
+SNIPPET_TOKENS = 16
+# Match markers around highlighted terms; escaped text never contains them
+_OPEN, _CLOSE = '\x02', '\x03'
+
+NoteHit = namedtuple('NoteHit', 'note patient_name score snippet')
+
+fts_table = table('clinical_note_fts', column('rowid'))
+
+_SQLITE_DDL = (
+    """CREATE VIRTUAL TABLE IF NOT EXISTS clinical_note_fts USING fts5(
+        findings, treatment_plan,
+        content='clinical_note', content_rowid='note_id',
+        tokenize='porter unicode61'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS clinical_note_fts_insert AFTER INSERT ON clinical_note BEGIN
+        INSERT INTO clinical_note_fts(rowid, findings, treatment_plan)
+        VALUES (new.note_id, new.findings, new.treatment_plan);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS clinical_note_fts_delete AFTER DELETE ON clinical_note BEGIN
+        INSERT INTO clinical_note_fts(clinical_note_fts, rowid, findings, treatment_plan)
+        VALUES ('delete', old.note_id, old.findings, old.treatment_plan);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS clinical_note_fts_update AFTER UPDATE ON clinical_note BEGIN
+        INSERT INTO clinical_note_fts(clinical_note_fts, rowid, findings, treatment_plan)
+        VALUES ('delete', old.note_id, old.findings, old.treatment_plan);
+        INSERT INTO clinical_note_fts(rowid, findings, treatment_plan)
+        VALUES (new.note_id, new.findings, new.treatment_plan);
+    END""",
+    # Index every note written before the table existed
+    "INSERT INTO clinical_note_fts(clinical_note_fts) VALUES ('rebuild')",
+)
+
+_PG_DOCUMENT = "coalesce(findings, '') || ' ' || coalesce(treatment_plan, '')"
+_PG_DDL = (
+    f"""CREATE INDEX IF NOT EXISTS ix_clinical_note_search ON clinical_note
+        USING gin (to_tsvector('english', {_PG_DOCUMENT}))""",
+)
+
+
+def install():
+    """Create the search index for the bound database. Returns the backend used."""
+    dialect = db.engine.dialect.name
+    statements = {'sqlite': _SQLITE_DDL, 'postgresql': _PG_DDL}.get(dialect)
+    if not statements:
+        return 'like'
+    try:
+        with db.engine.begin() as conn:
+            for statement in statements:
+                conn.execute(text(statement))
+    except OperationalError:
+        # SQLite compiled without FTS5: search still works through LIKE
+        return 'like'
+    return backend()
+
+
+def backend():
+    """'fts5', 'postgresql' or 'like', depending on what the database offers."""
+    dialect = db.engine.dialect.name
+    if dialect == 'postgresql':
+        return 'postgresql'
+    if dialect == 'sqlite' and inspect(db.engine).has_table('clinical_note_fts'):
+        return 'fts5'
+    return 'like'
+
+
+def search_terms(query_text):
+    """Split free text into plain word terms; punctuation and operators are dropped."""
+    return re.findall(r'\w+', query_text or '')
+
+
+def _fts5_query(terms):
+    # Quote every term so user input can never be read as FTS5 syntax;
+    # the last one is a prefix so partially typed words still match
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += '*'
+    return ' '.join(quoted)
+
+
+def _highlight(snippet):
+    if snippet is None:
+        return None
+    return Markup(
+        str(escape(snippet)).replace(_OPEN, '<mark>').replace(_CLOSE, '</mark>')
+    )
+
+
+def search_notes(query_text, provider_id=None, recipient_id=None, limit=MAX_RESULTS):
+    """
+    Return up to ``limit`` NoteHits for ``query_text``, best match first,
+    optionally restricted to notes written by ``provider_id`` and/or about
+    ``recipient_id``. Every term must match (stemmed where the backend can).
+    """
+    terms = search_terms(query_text)
+    if not terms:
+        return []
+
+    patient_name = func.trim(
+        func.coalesce(Account.given_name, '') + ' ' + func.coalesce(Account.surname, '')
+    )
+    kind = backend()
+
+    if kind == 'fts5':
+        fts = literal_column('clinical_note_fts')
+        score = func.bm25(fts, 2.0, 1.0)
+        snippet = func.snippet(fts, -1, _OPEN, _CLOSE, '…', SNIPPET_TOKENS)
+        query = (
+            db.session.query(ClinicalNote, patient_name, -score, snippet)
+            .join(fts_table, fts_table.c.rowid == ClinicalNote.note_id)
+            .filter(fts.op('MATCH')(_fts5_query(terms)))
+            .order_by(score)
+        )
+    elif kind == 'postgresql':
+        document = func.to_tsvector('english', text(_PG_DOCUMENT))
+        tsquery = func.websearch_to_tsquery('english', ' '.join(terms))
+        score = func.ts_rank_cd(document, tsquery)
+        snippet = func.ts_headline(
+            'english', text(_PG_DOCUMENT), tsquery,
+            f'StartSel={_OPEN}, StopSel={_CLOSE}, MaxWords={SNIPPET_TOKENS}, MinWords=5'
+        )
+        query = (
+            db.session.query(ClinicalNote, patient_name, score, snippet)
+            .filter(document.op('@@')(tsquery))
+            .order_by(score.desc())
+        )
+    else:
+        matches = [
+            or_(ClinicalNote.findings.ilike(f'%{term}%'), ClinicalNote.treatment_plan.ilike(f'%{term}%'))
+            for term in terms
+        ]
+        query = (
+            db.session.query(ClinicalNote, patient_name, literal_column('NULL'), literal_column('NULL'))
+            .options(undefer_group('note_body'))
+            .filter(and_(*matches))
+            .order_by(ClinicalNote.noted_on.desc())
+        )
+
+    query = query.outerjoin(Account, Account.account_id == ClinicalNote.recipient_id)
+    if provider_id:
+        query = query.filter(ClinicalNote.provider_id == provider_id)
+    if recipient_id:
+        query = query.filter(ClinicalNote.recipient_id == recipient_id)
+
+    return [
+        NoteHit(note, name, rank, _highlight(snip))
+        for note, name, rank, snip in query.limit(limit).all()
+    ]
@@ -0,0 +1,120 @@
+"""
+Keyset (cursor) pagination for list views.
+
+Instead of OFFSET, each page remembers the sort key of its last row in an
+opaque ``cursor`` query argument and the next page filters on "rows after that
+key". With an index on the sort columns, page N costs the same as page 1.
+"""
+import base64
+import json
+from datetime import date, datetime
+
+from flask import current_app, request, url_for
+from sqlalchemy import and_, or_
+
+
+class Page:
+    """One page of results plus the cursor needed to fetch the next one."""
+
+    def __init__(self, items, cursor=None, next_cursor=None):
+        self.items = items
+        self.cursor = cursor
+        self.next_cursor = next_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def is_first(self):
+        return not self.cursor
+
+    def next_url(self):
+        """URL of the following page, keeping the current filters."""
+        return _page_url(cursor=self.next_cursor)
+
+    def first_url(self):
+        """URL of the first page, keeping the current filters."""
+        return _page_url(cursor=None)
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+
+def _page_url(cursor):
+    args = request.args.to_dict()
+    args.pop('cursor', None)
+    if cursor:
+        args['cursor'] = cursor
+    return url_for(request.endpoint, **(request.view_args or {}), **args)
+
+
+def encode_cursor(values):
+    """Pack the sort key of a row into a URL-safe token."""
+    plain = [v.isoformat() if isinstance(v, (date, datetime)) else v for v in values]
+    raw = json.dumps(plain, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token, columns):
+    """
+    Unpack a cursor token into values typed like ``columns``.
+    Returns None when the token is malformed so callers fall back to page 1.
+    """
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        if not isinstance(values, list) or len(values) != len(columns):
+            return None
+
+        typed = []
+        for column, value in zip(columns, values):
+            python_type = column.type.python_type
+            if python_type is datetime:
+                value = datetime.fromisoformat(value)
+            elif python_type is date:
+                value = date.fromisoformat(value)
+            elif python_type is int:
+                value = int(value)
+            typed.append(value)
+        return typed
+    except (ValueError, TypeError, NotImplementedError):
+        return None
+
+
+def _after_key(columns, values, descending):
+    """Build "(c1, c2, ...) > (v1, v2, ...)" (or < when descending)."""
+    clauses = []
+    for i, column in enumerate(columns):
+        equal_prefix = [columns[j] == values[j] for j in range(i)]
+        step = column < values[i] if descending else column > values[i]
+        clauses.append(and_(*equal_prefix, step))
+    return or_(*clauses)
+
+
+def keyset_paginate(query, columns, cursor=None, per_page=None, descending=False):
+    """
+    Return a Page of ``query`` ordered by ``columns``.
+    The last column must be unique (normally the primary key) so the order is total.
+    """
+    if per_page is None:
+        per_page = current_app.config.get('ITEMS_PER_PAGE', 20)
+
+    values = decode_cursor(cursor, columns) if cursor else None
+    if values is None:
+        cursor = None
+    else:
+        query = query.filter(_after_key(columns, values, descending))
+
+    ordering = [c.desc() if descending else c.asc() for c in columns]
+    rows = query.order_by(*ordering).limit(per_page + 1).all()
+
+    next_cursor = None
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        next_cursor = encode_cursor([getattr(rows[-1], c.key) for c in columns])
+
+    return Page(rows, cursor=cursor, next_cursor=next_cursor)
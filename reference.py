@@ -0,0 +1,70 @@
+"""
+Read-through cache for reference tables that almost never change.
+
+Clinics (departments) and access levels are read on nearly every form and
+registration. This module keeps plain snapshots of both in a process-wide
+cache, warmed at startup and dropped when a clinic is created. The TTL
+bounds staleness in other worker processes.
+"""
+from collections import namedtuple
+
+from caching import LRUCache
+from models import db, AccessLevel, Clinic, department_code
+
+
+class ClinicRef(namedtuple('ClinicRef', 'clinic_id clinic_title clinic_notes')):
+    __slots__ = ()
+
+    @property
+    def short_code(self):
+        return department_code(self.clinic_title)
+
+
+reference_cache = LRUCache('reference', maxsize=8, ttl=300)
+
+
+def _load_clinics():
+    rows = db.session.query(
+        Clinic.clinic_id, Clinic.clinic_title, Clinic.clinic_notes
+    ).order_by(Clinic.clinic_id).all()
+    return tuple(ClinicRef(*row) for row in rows)
+
+
+def _load_tiers():
+    return dict(db.session.query(AccessLevel.tier_name, AccessLevel.tier_id).all())
+
+
+def all_clinics():
+    """Every clinic in primary-key order, as ClinicRef tuples."""
+    return reference_cache.get_or_load('clinics', _load_clinics)
+
+
+def clinics_by_title():
+    """Every clinic sorted by title, for filter dropdowns."""
+    return sorted(all_clinics(), key=lambda c: c.clinic_title)
+
+
+def clinic_by_id(clinic_id):
+    """Return the ClinicRef for ``clinic_id``, or None if it does not exist."""
+    try:
+        clinic_id = int(clinic_id)
+    except (TypeError, ValueError):
+        return None
+    return next((c for c in all_clinics() if c.clinic_id == clinic_id), None)
+
+
+def tier_id(tier_name):
+    """Primary key of the access level called ``tier_name`` (or None)."""
+    return reference_cache.get_or_load('tiers', _load_tiers).get(tier_name)
+
+
+def invalidate():
+    """Forget cached reference data; call after committing a change to it."""
+    reference_cache.clear()
+
+
+def warm():
+    """Load every reference table so the first requests skip the database."""
+    invalidate()
+    all_clinics()
+    tier_id('admin')
@@ -1,8 +1,15 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash
+from flask import Blueprint, render_template, request, redirect, url_for, flash, abort
 from flask_login import login_required, current_user
 from models import db, Recipient, Provider, TimeSlot, Session, Clinic, ClinicalNote
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+from scheduling import earliest_open_slots, open_slots_for, invalidate_open_slots
+from reference import all_clinics, clinic_by_id, clinics_by_title
+from loaders import note_listing
+from pagination import keyset_paginate
+from conditional import conditional, touch_scope
 from functools import wraps
-from datetime import datetime
+from datetime import datetime, timedelta
 
 clientele_bp = Blueprint('clientele', __name__)
 
@@ -51,16 +58,20 @@ def hub():
 @clientele_bp.route('/clinics')
 @login_required
 @recipient_only
+@conditional(Clinic)
 def browse_clinics():
-    clinics = Clinic.query.all()
+    clinics = all_clinics()
     return render_template('clientele/browse_clinics.html', clinics=clinics)
 
 
 @clientele_bp.route('/clinics/<int:clinic_id>/providers')
 @login_required
 @recipient_only
+@conditional(Clinic, Provider)
 def search_providers(clinic_id):
-    clinic = Clinic.query.get_or_404(clinic_id)
+    clinic = clinic_by_id(clinic_id)
+    if clinic is None:
+        abort(404)
     providers = Provider.query.filter_by(clinic_id=clinic_id).all()
     return render_template(
         'clientele/search_providers.html',
@@ -72,9 +83,10 @@ def search_providers(clinic_id):
 @clientele_bp.route('/providers/<int:provider_id>')
 @login_required
 @recipient_only
+@conditional(Provider, scoped={TimeSlot: 'provider_id'})
 def view_provider(provider_id):
     provider = Provider.query.get_or_404(provider_id)
-    slots = TimeSlot.query.filter_by(provider_id=provider_id, slot_available=True).all()
+    slots = open_slots_for(provider_id)
     return render_template(
         'clientele/provider_detail.html',
         provider=provider,
@@ -82,24 +94,72 @@ def view_provider(provider_id):
     )
 
 
+@clientele_bp.route('/next-available')
+@login_required
+@recipient_only
+def next_available():
+    """Soonest open slots across all providers, optionally within one clinic."""
+    clinic_id = request.args.get('clinic_id', type=int)
+    days = min(max(request.args.get('days', 14, type=int), 1), 90)
+    limit = min(max(request.args.get('limit', 10, type=int), 1), 50)
+
+    try:
+        window_start = datetime.strptime(request.args.get('date_from', ''), '%Y-%m-%d')
+    except ValueError:
+        window_start = datetime.now()
+    # Never offer slots that have already started
+    window_start = max(window_start, datetime.now())
+    window_end = window_start.replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=days + 1)
+
+    slots = earliest_open_slots(window_start, window_end, clinic_id=clinic_id, limit=limit)
+    return render_template(
+        'clientele/next_available.html',
+        slots=slots,
+        clinics=clinics_by_title(),
+        clinic_id=clinic_id,
+        days=days,
+        date_from=window_start
+    )
+
+
+def claim_slot(slot_id):
+    """
+    Atomically mark an open slot as taken in the current transaction.
+    Returns the slot's provider_id, or None if the slot is missing or was
+    already claimed. Only one concurrent caller can win a given slot.
+    """
+    claim = (
+        update(TimeSlot)
+        .where(TimeSlot.slot_id == slot_id, TimeSlot.slot_available.is_(True))
+        .values(slot_available=False)
+    )
+
+    if getattr(db.engine.dialect, 'update_returning', False):
+        provider_id = db.session.execute(claim.returning(TimeSlot.provider_id)).scalar()
+    elif db.session.execute(claim).rowcount != 1:
+        return None
+    else:
+        provider_id = db.session.query(TimeSlot.provider_id).filter_by(slot_id=slot_id).scalar()
+
+    if provider_id is not None:
+        touch_scope(TimeSlot, provider_id)
+    return provider_id
+
+
 @clientele_bp.route('/book', methods=['GET', 'POST'])
 @login_required
 @recipient_only
 def book_session():
     if request.method == 'POST':
-        slot_id = request.form.get('slot_id')
-        provider_id = request.form.get('provider_id')
-
-        slot = TimeSlot.query.get_or_404(slot_id)
-
-        # Prevent booking unavailable slots
-        if not slot.slot_available:
-            flash('Selected slot is no longer available.', 'error')
+        slot_id = request.form.get('slot_id', type=int)
+        if not slot_id:
+            flash('Please choose an available slot.', 'error')
             return redirect(url_for('clientele.book_session'))
 
-        # Avoid double booking
-        if Session.query.filter_by(slot_id=slot_id).first():
-            flash('Slot already booked.', 'error')
+        provider_id = claim_slot(slot_id)
+        if provider_id is None:
+            db.session.rollback()
+            flash('Selected slot is no longer available.', 'error')
             return redirect(url_for('clientele.book_session'))
 
         new_session = Session(
@@ -109,11 +169,17 @@ def book_session():
             slot_id=slot_id,
             session_state='scheduled'
         )
-
         db.session.add(new_session)
-        slot.slot_available = False
-        db.session.commit()
 
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # uq_session_active_slot caught a booking that slipped past the claim
+            db.session.rollback()
+            flash('Slot already booked.', 'error')
+            return redirect(url_for('clientele.book_session'))
+
+        invalidate_open_slots(provider_id)
         flash('Session booked successfully.', 'success')
         return redirect(url_for('clientele.hub'))
 
@@ -152,6 +218,7 @@ def cancel_session(session_id):
     session_obj.session_state = 'cancelled'
 
     # Free the time slot for future bookings
+    slot = None
     if session_obj.slot_id:
         slot = TimeSlot.query.get(session_obj.slot_id)
         if slot:
@@ -159,6 +226,9 @@ def cancel_session(session_id):
 
     db.session.commit()
 
+    if slot:
+        invalidate_open_slots(slot.provider_id)
+
     flash('Session cancelled.', 'success')
     return redirect(url_for('clientele.view_sessions'))
 
@@ -167,10 +237,22 @@ def cancel_session(session_id):
 @login_required
 @recipient_only
 def treatment_history():
-    records = ClinicalNote.query.filter_by(
-        recipient_id=current_user.account_id
-    ).order_by(
-        ClinicalNote.noted_on.desc()
-    ).all()
+    page = keyset_paginate(
+        note_listing(current_user.account_id),
+        [ClinicalNote.noted_on, ClinicalNote.note_id],
+        cursor=request.args.get('cursor'),
+        descending=True
+    )
+
+    return render_template('clientele/treatment_history.html', records=page.items, page=page)
 
-    return render_template('clientele/treatment_history.html', records=records)
+
+@clientele_bp.route('/treatment-history/<int:note_id>')
+@login_required
+@recipient_only
+def treatment_note(note_id):
+    """Findings and plan of one of the patient's own notes, loaded on expand."""
+    note = ClinicalNote.query.get_or_404(note_id)
+    if note.recipient_id != current_user.account_id:
+        abort(404)
+    return render_template('_note_body.html', note=note)
@@ -1,9 +1,21 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash
+from flask import (
+    Blueprint, Response, render_template, request, redirect, url_for, flash,
+    abort, stream_with_context
+)
 from flask_login import login_required, current_user
 from models import db, Account, AccessLevel, Provider, Clinic, Session, Recipient
+from loaders import provider_listing, recipient_listing, session_listing
+from pagination import keyset_paginate
+from conditional import conditional
+from counters import adjust, dashboard_counts
+import reference
+from identity_cache import forget
+from importer import IMPORT_KINDS, import_accounts
+from exports import DATASETS, EXPORT_FORMATS, STREAMERS, export_statement
 from werkzeug.security import generate_password_hash
 from functools import wraps
-from datetime import datetime
+from datetime import datetime, timedelta
+import io
 
 governance_bp = Blueprint('governance', __name__)
 
@@ -18,24 +30,40 @@ def administrator_only(fn):
     return decorated
 
 
+def parse_day(value):
+    """Parse a YYYY-MM-DD filter value, returning None when absent or invalid."""
+    try:
+        return datetime.strptime(value, '%Y-%m-%d') if value else None
+    except ValueError:
+        return None
+
+
+def record_filters():
+    """Status, clinic, provider and date-range filters shared by listings and exports."""
+    return {
+        'status': request.args.get('status') or None,
+        'clinic_id': request.args.get('clinic_id', type=int),
+        'provider_id': request.args.get('provider_id', type=int),
+        'date_from': parse_day(request.args.get('date_from')),
+        'date_to': parse_day(request.args.get('date_to')),
+    }
+
+
 @governance_bp.route('/hub')
 @login_required
 @administrator_only
 def hub():
-    # Count providers, recipients, sessions and clinics directly from their models
-    total_providers = Provider.query.count()
-    total_recipients = Recipient.query.count()
-    total_sessions = Session.query.count()
-    total_clinics = Clinic.query.count()
+    # Totals are maintained incrementally in entity_counter (see counters.py)
+    totals = dashboard_counts()
 
-    latest_sessions = Session.query.order_by(Session.booked_timestamp.desc()).limit(5).all()
+    latest_sessions = session_listing().order_by(Session.booked_timestamp.desc()).limit(5).all()
 
     return render_template(
         'governance/dashboard.html',
-        provider_count=total_providers,
-        recipient_count=total_recipients,
-        session_count=total_sessions,
-        clinic_count=total_clinics,
+        provider_count=totals.get('provider', 0),
+        recipient_count=totals.get('recipient', 0),
+        session_count=totals.get('session', 0),
+        clinic_count=totals.get('clinic', 0),
         recent_sessions=latest_sessions
     )
 
@@ -44,15 +72,27 @@ def hub():
 @login_required
 @administrator_only
 def list_providers():
-    providers = Provider.query.all()
-    return render_template('governance/providers_list.html', providers=providers)
+    clinic_filter = request.args.get('clinic_id', type=int)
+
+    query = provider_listing()
+    if clinic_filter:
+        query = query.filter(Provider.clinic_id == clinic_filter)
+
+    page = keyset_paginate(query, [Provider.provider_id], cursor=request.args.get('cursor'))
+    return render_template(
+        'governance/providers_list.html',
+        providers=page.items,
+        page=page,
+        clinics=reference.clinics_by_title(),
+        clinic_filter=clinic_filter
+    )
 
 
 @governance_bp.route('/providers/create', methods=['GET', 'POST'])
 @login_required
 @administrator_only
 def create_provider():
-    clinics = Clinic.query.all()
+    clinics = reference.all_clinics()
 
     if request.method == 'POST':
         email_addr = request.form.get('email_address')
@@ -72,15 +112,13 @@ def create_provider():
             flash('Email already in use.', 'error')
             return redirect(url_for('governance.create_provider'))
 
-        provider_tier = AccessLevel.query.filter_by(tier_name='provider').first()
-
         # Use the local helper already imported at the top
         acct = Account(
             email_address=email_addr,
             credential_hash=generate_password_hash(password_input),
             given_name=given_n,
             surname=last_n,
-            access_tier=provider_tier
+            tier_id=reference.tier_id('provider')
         )
 
         db.session.add(acct)
@@ -115,7 +153,7 @@ def create_provider():
 @administrator_only
 def edit_provider(provider_id):
     provider = Provider.query.get_or_404(provider_id)
-    clinics = Clinic.query.all()
+    clinics = reference.all_clinics()
 
     if request.method == 'POST':
         given_n = request.form.get('given_name')
@@ -146,6 +184,7 @@ def edit_provider(provider_id):
         provider.expertise = expertise_field
 
         db.session.commit()
+        forget(provider_id)
 
         flash(f'Doctor {given_n} {last_n} updated successfully.', 'success')
         return redirect(url_for('governance.list_providers'))
@@ -163,15 +202,20 @@ def delete_provider(provider_id):
 
     try:
         # Delete related sessions first (to maintain referential integrity)
-        Session.query.filter_by(provider_id=provider_id).delete()
+        removed_sessions = Session.query.filter_by(provider_id=provider_id).delete()
 
         # Delete provider record
-        Provider.query.filter_by(provider_id=provider_id).delete()
+        removed_providers = Provider.query.filter_by(provider_id=provider_id).delete()
+
+        # Bulk deletes skip the ORM events that keep dashboard totals current
+        adjust(Session, -removed_sessions)
+        adjust(Provider, -removed_providers)
 
         # Delete account record
         Account.query.filter_by(account_id=account.account_id).delete()
 
         db.session.commit()
+        forget(account.account_id)
         flash(f'Doctor {doctor_name} and all associated data have been deleted.', 'success')
     except Exception as e:
         db.session.rollback()
@@ -184,15 +228,27 @@ def delete_provider(provider_id):
 @login_required
 @administrator_only
 def list_recipients():
-    recipients = Recipient.query.all()
-    return render_template('governance/recipients_list.html', recipients=recipients)
+    clinic_filter = request.args.get('clinic_id', type=int)
+
+    query = recipient_listing()
+    if clinic_filter:
+        query = query.filter(Recipient.clinic_id == clinic_filter)
+
+    page = keyset_paginate(query, [Recipient.recipient_id], cursor=request.args.get('cursor'))
+    return render_template(
+        'governance/recipients_list.html',
+        recipients=page.items,
+        page=page,
+        clinics=reference.clinics_by_title(),
+        clinic_filter=clinic_filter
+    )
 
 
 @governance_bp.route('/patients/new', methods=['GET', 'POST'])
 @login_required
 @administrator_only
 def create_patient():
-    clinics = Clinic.query.all()
+    clinics = reference.all_clinics()
 
     if request.method == 'POST':
         email_addr = request.form.get('email_address')
@@ -220,21 +276,18 @@ def create_patient():
             flash('Selected department is invalid.', 'error')
             return redirect(url_for('governance.create_patient'))
 
-        clinic_check = Clinic.query.filter_by(clinic_id=clinic_id_val).first()
+        clinic_check = reference.clinic_by_id(clinic_id_val)
         if not clinic_check:
             flash('Selected department is invalid.', 'error')
             return redirect(url_for('governance.create_patient'))
 
-        # Get patient access level
-        patient_tier = AccessLevel.query.filter_by(tier_name='patient').first()
-
         # Create new account
         new_account = Account(
             email_address=email_addr,
             credential_hash=generate_password_hash(password_input),
             given_name=first_name,
             surname=last_name,
-            access_tier=patient_tier
+            tier_id=reference.tier_id('patient')
         )
 
         db.session.add(new_account)
@@ -258,12 +311,44 @@ def create_patient():
     return render_template('governance/patient_form.html', clinics=clinics)
 
 
+@governance_bp.route('/accounts/import', methods=['GET', 'POST'])
+@login_required
+@administrator_only
+def import_csv():
+    kind = request.values.get('kind', 'patient')
+    if kind not in IMPORT_KINDS:
+        kind = 'patient'
+
+    if request.method == 'POST':
+        upload = request.files.get('csv_file')
+        if not upload or not upload.filename:
+            flash('Choose a CSV file to import.', 'error')
+            return redirect(url_for('governance.import_csv', kind=kind))
+
+        stream = io.TextIOWrapper(upload.stream, encoding='utf-8-sig', newline='')
+        try:
+            # Hash inline: request workers may not be able to fork (serverless)
+            # and should not spawn a pool per upload anyway; the CLI uses one
+            report = import_accounts(stream, kind, workers=1)
+        except (ValueError, UnicodeDecodeError) as e:
+            flash(f'Could not read the file: {e}', 'error')
+            return redirect(url_for('governance.import_csv', kind=kind))
+
+        flash(f'{report.created} {kind} account(s) imported.', 'success')
+        if report.rejected:
+            flash(f'{report.rejected} row(s) were not imported; see the report below.', 'warning')
+        return render_template('governance/import_accounts.html', kind=kind, report=report)
+
+    return render_template('governance/import_accounts.html', kind=kind, report=None)
+
+
 @governance_bp.route('/clinics')
 @login_required
 @administrator_only
+@conditional(Clinic)
 def list_clinics():
-    clinics = Clinic.query.all()
-    return render_template('governance/clinics_list.html', clinics=clinics)
+    page = keyset_paginate(Clinic.query, [Clinic.clinic_id], cursor=request.args.get('cursor'))
+    return render_template('governance/clinics_list.html', clinics=page.items, page=page)
 
 
 @governance_bp.route('/clinics/create', methods=['GET', 'POST'])
@@ -285,6 +370,7 @@ def create_clinic():
         )
         db.session.add(new_clinic)
         db.session.commit()
+        reference.invalidate()
 
         flash(f'Clinic {clinic_name} created.', 'success')
         return redirect(url_for('governance.list_clinics'))
@@ -296,16 +382,64 @@ def create_clinic():
 @login_required
 @administrator_only
 def list_sessions():
-    sessions = Session.query.order_by(Session.booked_timestamp.desc()).all()
-    return render_template('governance/sessions_list.html', sessions=sessions)
+    filters = record_filters()
+
+    query = session_listing()
+    if filters['status']:
+        query = query.filter(Session.session_state == filters['status'])
+    if filters['provider_id']:
+        query = query.filter(Session.provider_id == filters['provider_id'])
+    if filters['clinic_id']:
+        clinic_providers = db.session.query(Provider.provider_id).filter(
+            Provider.clinic_id == filters['clinic_id']
+        )
+        query = query.filter(Session.provider_id.in_(clinic_providers))
+    if filters['date_from']:
+        query = query.filter(Session.booked_timestamp >= filters['date_from'])
+    if filters['date_to']:
+        # Inclusive of the whole "to" day
+        query = query.filter(Session.booked_timestamp < filters['date_to'] + timedelta(days=1))
+
+    # Newest first; session_id breaks ties between identical timestamps
+    page = keyset_paginate(
+        query,
+        [Session.booked_timestamp, Session.session_id],
+        cursor=request.args.get('cursor'),
+        descending=True
+    )
+    return render_template(
+        'governance/sessions_list.html',
+        sessions=page.items,
+        page=page,
+        clinics=reference.clinics_by_title(),
+        filters=filters
+    )
+
+
+@governance_bp.route('/export/<dataset>')
+@login_required
+@administrator_only
+def export_records(dataset):
+    """Stream sessions or clinical notes as CSV (default) or NDJSON."""
+    fmt = request.args.get('format', 'csv')
+    if dataset not in DATASETS or fmt not in EXPORT_FORMATS:
+        abort(404)
+
+    stmt = export_statement(dataset, **record_filters())
+    filename = f"{dataset}-{datetime.utcnow():%Y%m%d-%H%M%S}.{fmt}"
+    return Response(
+        stream_with_context(STREAMERS[fmt](stmt)),
+        mimetype=EXPORT_FORMATS[fmt],
+        headers={'Content-Disposition': f'attachment; filename="{filename}"'}
+    )
 
 
 @governance_bp.route('/sessions/create', methods=['GET', 'POST'])
 @login_required
 @administrator_only
 def create_session():
-    providers = Provider.query.all()
-    recipients = Recipient.query.all()
+    providers = provider_listing().all()
+    recipients = recipient_listing().all()
     
     if request.method == 'POST':
         provider_id_raw = request.form.get('provider_id')
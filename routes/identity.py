@@ -7,6 +7,10 @@ from werkzeug.security import check_password_hash, generate_password_hash
 from datetime import datetime
 
 from models import db, Account, AccessLevel, Recipient, Provider, Clinic
+from reference import all_clinics, clinic_by_id, tier_id
+from identity_cache import account_record, forget
+from admission import guard, hashing
+from credentials import needs_rehash
 
 # Blueprint for login, signup, and profile-related actions
 identity_bp = Blueprint("identity", __name__)
@@ -16,6 +20,7 @@ identity_bp = Blueprint("identity", __name__)
 # Sign In
 # ---------------------------------------------------------
 @identity_bp.route("/signin", methods=["GET", "POST"])
+@guard
 def signin():
     """Authenticate the user and redirect based on their role."""
 
@@ -35,7 +40,17 @@ def signin():
 
         user = Account.query.filter_by(email_address=email).first()
 
-        if user and check_password_hash(user.credential_hash, password):
+        password_ok = False
+        if user:
+            with hashing():
+                password_ok = check_password_hash(user.credential_hash, password)
+                # Upgrade hashes made with an older method or cost while the
+                # plain password is at hand
+                if password_ok and needs_rehash(user.credential_hash):
+                    user.credential_hash = generate_password_hash(password)
+                    db.session.commit()
+
+        if user and password_ok:
             login_user(user)
             flash("Logged in successfully.", "success")
 
@@ -56,6 +71,7 @@ def signin():
 # Sign Up
 # ---------------------------------------------------------
 @identity_bp.route("/signup", methods=["GET", "POST"])
+@guard
 def signup():
     """Create a new patient account with clinic selection."""
 
@@ -88,19 +104,21 @@ def signup():
             return redirect(url_for("identity.signup"))
 
         # Verify clinic exists
-        clinic = Clinic.query.filter_by(clinic_id=clinic_id).first()
+        clinic = clinic_by_id(clinic_id)
         if not clinic:
             flash("Selected department is invalid.", "error")
             return redirect(url_for("identity.signup"))
 
+        with hashing():
+            credential = generate_password_hash(pwd1)
+
         # Create patient account
-        patient_role = AccessLevel.query.filter_by(tier_name="patient").first()
         new_user = Account(
             email_address=email,
-            credential_hash=generate_password_hash(pwd1),
+            credential_hash=credential,
             given_name=fname,
             surname=lname,
-            access_tier=patient_role
+            tier_id=tier_id("patient")
         )
         db.session.add(new_user)
         db.session.flush()  # Get the ID before commit
@@ -108,7 +126,7 @@ def signup():
         # Link patient record with clinic selection
         patient_profile = Recipient(
             recipient_id=new_user.account_id,
-            clinic_id=clinic_id
+            clinic_id=clinic.clinic_id
         )
         db.session.add(patient_profile)
         db.session.commit()
@@ -117,7 +135,7 @@ def signup():
         return redirect(url_for("identity.signin"))
 
     # GET request: fetch all clinics to display in dropdown
-    clinics = Clinic.query.all()
+    clinics = all_clinics()
     return render_template("authentication/signup.html", clinics=clinics)
 
 
@@ -150,9 +168,11 @@ def profile_view():
 @login_required
 def update_profile():
     """Update user's name."""
-    current_user.given_name = request.form.get("given_name")
-    current_user.surname = request.form.get("surname")
+    account = account_record()
+    account.given_name = request.form.get("given_name")
+    account.surname = request.form.get("surname")
     db.session.commit()
+    forget(account.account_id)
 
     flash("Profile updated successfully.", "success")
     return redirect(url_for("identity.profile_view"))
@@ -169,8 +189,10 @@ def change_password():
     new_pwd = request.form.get("new_credential")
     confirm_pwd = request.form.get("confirm_credential")
 
+    account = account_record()
+
     # Check old password
-    if not check_password_hash(current_user.credential_hash, old_pwd):
+    if not check_password_hash(account.credential_hash, old_pwd):
         flash("Your current password is incorrect.", "error")
         return redirect(url_for("identity.profile_view"))
 
@@ -178,8 +200,9 @@ def change_password():
         flash("New passwords do not match.", "error")
         return redirect(url_for("identity.profile_view"))
 
-    current_user.credential_hash = generate_password_hash(new_pwd)
+    account.credential_hash = generate_password_hash(new_pwd)
     db.session.commit()
+    forget(account.account_id)
 
     flash("Password changed successfully.", "success")
     return redirect(url_for("identity.profile_view"))
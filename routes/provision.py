@@ -1,6 +1,10 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash
 from flask_login import login_required, current_user
 from models import db, Provider, TimeSlot, Session, ClinicalNote
+from scheduling import expand_pattern, parse_slot_list, publish_slots, withdraw_slots
+from note_search import search_notes
+from loaders import note_listing
+from pagination import keyset_paginate
 from functools import wraps
 from datetime import datetime
 
@@ -63,14 +67,10 @@ def add_availability():
             flash('Invalid date/time or duration.', 'error')
             return redirect(url_for('provision.add_availability'))
 
-        new_slot = TimeSlot(
-            provider_id=current_user.account_id,
-            starts_at=start_dt,
-            duration_mins=duration,
-            slot_available=True
-        )
-        db.session.add(new_slot)
-        db.session.commit()
+        created, rejected = publish_slots(current_user.account_id, [(start_dt, duration)])
+        if not created:
+            flash(f'Slot not added: {rejected[0][1]}.', 'error')
+            return redirect(url_for('provision.add_availability'))
 
         flash('Availability slot added.', 'success')
         return redirect(url_for('provision.manage_availability'))
@@ -78,6 +78,66 @@ def add_availability():
     return render_template('provision/add_slot_form.html')
 
 
+@provision_bp.route('/availability/bulk', methods=['GET', 'POST'])
+@login_required
+@provider_only
+def bulk_availability():
+    if request.method == 'POST':
+        mode = request.form.get('mode', 'pattern')
+
+        try:
+            duration = int(request.form.get('duration_mins') or 60)
+            if mode == 'list':
+                upload = request.files.get('slot_file')
+                text = upload.read().decode('utf-8') if upload and upload.filename else ''
+                text = text or request.form.get('slot_list', '')
+                candidates = parse_slot_list(text, duration)
+            else:
+                date_from = datetime.strptime(request.form.get('date_from'), '%Y-%m-%d').date()
+                date_to = datetime.strptime(request.form.get('date_to'), '%Y-%m-%d').date()
+                day_start = datetime.strptime(request.form.get('day_start'), '%H:%M').time()
+                day_end = datetime.strptime(request.form.get('day_end'), '%H:%M').time()
+                weekdays = {int(d) for d in request.form.getlist('weekdays')}
+                if duration <= 0:
+                    raise ValueError('Duration must be positive.')
+                candidates = expand_pattern(date_from, date_to, weekdays, day_start, day_end, duration)
+        except (TypeError, ValueError, UnicodeDecodeError) as e:
+            flash(f'Could not read the schedule: {e}', 'error')
+            return redirect(url_for('provision.bulk_availability'))
+
+        if not candidates:
+            flash('The schedule did not produce any slots.', 'error')
+            return redirect(url_for('provision.bulk_availability'))
+
+        created, rejected = publish_slots(current_user.account_id, candidates)
+        flash(f'{created} slot(s) published.', 'success')
+        if rejected:
+            first_start, reason = rejected[0]
+            flash(
+                f'{len(rejected)} slot(s) skipped, e.g. {first_start:%Y-%m-%d %H:%M} ({reason}).',
+                'warning'
+            )
+        return redirect(url_for('provision.manage_availability'))
+
+    return render_template('provision/bulk_availability.html')
+
+
+@provision_bp.route('/availability/withdraw', methods=['POST'])
+@login_required
+@provider_only
+def withdraw_availability():
+    try:
+        date_from = datetime.strptime(request.form.get('date_from'), '%Y-%m-%d').date()
+        date_to = datetime.strptime(request.form.get('date_to'), '%Y-%m-%d').date()
+    except (TypeError, ValueError):
+        flash('Invalid date range.', 'error')
+        return redirect(url_for('provision.bulk_availability'))
+
+    removed = withdraw_slots(current_user.account_id, date_from, date_to)
+    flash(f'{removed} open slot(s) removed. Booked slots were kept.', 'success')
+    return redirect(url_for('provision.manage_availability'))
+
+
 @provision_bp.route('/sessions')
 @login_required
 @provider_only
@@ -149,18 +209,63 @@ def add_clinical_record(session_id):
     return render_template('provision/clinical_form.html', session=sess)
 
 
+@provision_bp.route('/notes/search')
+@login_required
+@provider_only
+def search_clinical_notes():
+    """
+    Ranked full-text search over clinical notes. Searches the provider's own
+    notes, or one patient's whole history when recipient_id is given (the
+    same notes view_recipient_history shows).
+    """
+    from models import Recipient
+    query_text = request.args.get('q', '').strip()
+    recipient = None
+    recipient_id = request.args.get('recipient_id', type=int)
+    if recipient_id:
+        recipient = Recipient.query.get_or_404(recipient_id)
+
+    hits = []
+    if query_text:
+        hits = search_notes(
+            query_text,
+            provider_id=None if recipient else current_user.account_id,
+            recipient_id=recipient_id
+        )
+
+    return render_template(
+        'provision/note_search.html',
+        query_text=query_text,
+        recipient=recipient,
+        hits=hits
+    )
+
+
 @provision_bp.route('/recipients/<int:recipient_id>/history')
 @login_required
 @provider_only
 def view_recipient_history(recipient_id):
-    from models import Recipient, ClinicalNote
+    from models import Recipient
     recipient = Recipient.query.get_or_404(recipient_id)
-    history_records = ClinicalNote.query.filter_by(
-        recipient_id=recipient_id
-    ).order_by(ClinicalNote.noted_on.desc()).all()
+    page = keyset_paginate(
+        note_listing(recipient_id),
+        [ClinicalNote.noted_on, ClinicalNote.note_id],
+        cursor=request.args.get('cursor'),
+        descending=True
+    )
 
     return render_template(
         'provision/recipient_history.html',
         recipient=recipient,
-        records=history_records
+        records=page.items,
+        page=page
     )
+
+
+@provision_bp.route('/notes/<int:note_id>/body')
+@login_required
+@provider_only
+def note_body(note_id):
+    """Findings and plan of one note, loaded when it is expanded in a history list."""
+    note = ClinicalNote.query.get_or_404(note_id)
+    return render_template('_note_body.html', note=note)
@@ -0,0 +1,43 @@
+import hmac
+import os
+
+from flask import Blueprint, Response, jsonify, request
+from flask_login import current_user
+
+import metrics
+from models import db
+
+# Blueprint for metrics scraping and health probes
+telemetry_bp = Blueprint('telemetry', __name__)
+
+
+def scrape_allowed():
+    """Allow admins, or scrapers presenting the METRICS_TOKEN bearer token."""
+    token = os.environ.get('METRICS_TOKEN')
+    header = request.headers.get('Authorization', '')
+    if token and hmac.compare_digest(header, f'Bearer {token}'):
+        return True
+    return current_user.is_authenticated and current_user.access_tier.tier_name == 'admin'
+
+
+@telemetry_bp.route('/metrics')
+def scrape():
+    if not scrape_allowed():
+        return Response('Forbidden\n', status=403, mimetype='text/plain')
+    return Response(metrics.render(db), mimetype='text/plain; version=0.0.4')
+
+
+@telemetry_bp.route('/health')
+def liveness():
+    """Process is up; does not touch the database."""
+    return Response('OK', mimetype='text/plain')
+
+
+@telemetry_bp.route('/ready')
+def readiness():
+    """Database is reachable; reports the round-trip latency."""
+    try:
+        latency = metrics.probe_database(db)
+    except Exception:
+        return jsonify(status='unavailable'), 503
+    return jsonify(status='ready', db_latency_ms=round(latency * 1000, 3))
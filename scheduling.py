@@ -0,0 +1,221 @@
+"""
+Bulk availability publishing with overlap detection.
+
+Candidate slots are checked against a per-provider ``IntervalSet`` - a sorted
+list of (start, end) pairs searched with ``bisect`` - that is loaded with one
+range query over the batch's time window. Accepted slots are inserted with a
+single executemany in one transaction, so a month of slots costs a handful of
+statements instead of one commit per slot.
+"""
+from bisect import bisect_left
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert
+from sqlalchemy.orm import contains_eager
+
+from caching import LRUCache
+from models import db, TimeSlot, Session, Provider
+
+# Longest slot we accept; also bounds how far back existing slots are scanned
+MAX_SLOT_MINUTES = 12 * 60
+# Upper bound on slots published (or parsed) per request
+MAX_BULK_SLOTS = 2000
+
+# Plain, session-independent copy of a TimeSlot row for the open-slot cache
+OpenSlot = namedtuple('OpenSlot', 'slot_id provider_id starts_at duration_mins')
+
+# provider_id -> tuple of OpenSlot; the TTL bounds staleness across workers
+open_slot_cache = LRUCache('open_slots', maxsize=2048, ttl=60)
+
+
+class IntervalSet:
+    """Non-overlapping half-open [start, end) intervals kept in start order."""
+
+    def __init__(self, intervals=()):
+        self.starts = []
+        self.ends = []
+        for start, end in sorted(intervals):
+            # Coalesce legacy rows that already overlap so the invariant holds
+            if self.ends and start < self.ends[-1]:
+                self.ends[-1] = max(self.ends[-1], end)
+                continue
+            self.starts.append(start)
+            self.ends.append(end)
+
+    def overlaps(self, start, end):
+        """True if [start, end) intersects any stored interval. O(log n)."""
+        i = bisect_left(self.starts, end)
+        # Only the interval starting just before `end` can reach back past `start`,
+        # because stored intervals never overlap each other
+        return i > 0 and self.ends[i - 1] > start
+
+    def add(self, start, end):
+        i = bisect_left(self.starts, start)
+        self.starts.insert(i, start)
+        self.ends.insert(i, end)
+
+    def __len__(self):
+        return len(self.starts)
+
+
+def load_intervals(provider_id, window_start, window_end):
+    """Build an IntervalSet of the provider's slots that could touch the window."""
+    rows = db.session.query(TimeSlot.starts_at, TimeSlot.duration_mins).filter(
+        TimeSlot.provider_id == provider_id,
+        TimeSlot.starts_at >= window_start - timedelta(minutes=MAX_SLOT_MINUTES),
+        TimeSlot.starts_at < window_end
+    ).all()
+    return IntervalSet(
+        (starts_at, starts_at + timedelta(minutes=duration or 0))
+        for starts_at, duration in rows
+    )
+
+
+def expand_pattern(date_from, date_to, weekdays, day_start, day_end, duration):
+    """
+    Generate (start, duration) candidates for every selected weekday between
+    date_from and date_to inclusive, back to back from day_start until day_end.
+    ``weekdays`` uses Python numbering (Monday == 0).
+    """
+    candidates = []
+    step = timedelta(minutes=duration)
+    day = date_from
+    while day <= date_to:
+        if day.weekday() in weekdays:
+            start = datetime.combine(day, day_start)
+            close = datetime.combine(day, day_end)
+            while start + step <= close:
+                candidates.append((start, duration))
+                if len(candidates) > MAX_BULK_SLOTS:
+                    raise ValueError(f'Pattern produces more than {MAX_BULK_SLOTS} slots.')
+                start += step
+        day += timedelta(days=1)
+    return candidates
+
+
+def parse_slot_list(text, default_duration):
+    """
+    Parse one slot per line: ``YYYY-MM-DDTHH:MM`` optionally followed by
+    ``,minutes``. Blank lines and lines starting with ``#`` are skipped.
+    Raises ValueError naming the first bad line.
+    """
+    candidates = []
+    for number, line in enumerate(text.splitlines(), start=1):
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        parts = [p.strip() for p in line.split(',')]
+        try:
+            start = datetime.fromisoformat(parts[0].replace(' ', 'T'))
+            duration = int(parts[1]) if len(parts) > 1 and parts[1] else default_duration
+        except ValueError:
+            raise ValueError(f'Line {number}: could not read "{line}".')
+        candidates.append((start, duration))
+        if len(candidates) > MAX_BULK_SLOTS:
+            raise ValueError(f'More than {MAX_BULK_SLOTS} slots in one upload.')
+    return candidates
+
+
+def publish_slots(provider_id, candidates):
+    """
+    Insert every candidate that does not overlap an existing slot or an
+    earlier candidate. Returns (created_count, rejected) where rejected is a
+    list of (start, reason). Commits once.
+    """
+    if not candidates:
+        return 0, []
+
+    window_start = min(start for start, _ in candidates)
+    window_end = max(start + timedelta(minutes=d) for start, d in candidates)
+    taken = load_intervals(provider_id, window_start, window_end)
+
+    rows = []
+    rejected = []
+    for start, duration in sorted(candidates):
+        if not 0 < duration <= MAX_SLOT_MINUTES:
+            rejected.append((start, 'invalid duration'))
+            continue
+        end = start + timedelta(minutes=duration)
+        if taken.overlaps(start, end):
+            rejected.append((start, 'overlaps an existing slot'))
+            continue
+        taken.add(start, end)
+        rows.append({
+            'provider_id': provider_id,
+            'starts_at': start,
+            'duration_mins': duration,
+            'slot_available': True,
+        })
+
+    if rows:
+        db.session.execute(insert(TimeSlot), rows)
+        db.session.commit()
+        invalidate_open_slots(provider_id)
+    return len(rows), rejected
+
+
+def withdraw_slots(provider_id, date_from, date_to):
+    """
+    Delete the provider's open slots starting between date_from and date_to
+    (inclusive). Booked slots, and open slots still referenced by a cancelled
+    session, are kept. Returns the number removed.
+    """
+    referenced = db.session.query(Session.session_id).filter(Session.slot_id == TimeSlot.slot_id)
+    removed = TimeSlot.query.filter(
+        TimeSlot.provider_id == provider_id,
+        TimeSlot.slot_available.is_(True),
+        ~referenced.exists(),
+        TimeSlot.starts_at >= datetime.combine(date_from, datetime.min.time()),
+        TimeSlot.starts_at < datetime.combine(date_to + timedelta(days=1), datetime.min.time())
+    ).delete(synchronize_session=False)
+    # conditional imports this module for invalidate_open_slots
+    from conditional import touch_scope
+    touch_scope(TimeSlot, provider_id)
+    db.session.commit()
+    invalidate_open_slots(provider_id)
+    return removed
+
+
+def earliest_open_slots(window_start, window_end, clinic_id=None, limit=10):
+    """
+    Return the first ``limit`` open slots starting in [window_start, window_end),
+    across every provider (or only those in ``clinic_id``), soonest first.
+    Walks ix_time_slot_open_start in order and stops at ``limit`` rows.
+    """
+    query = (
+        TimeSlot.query
+        .join(Provider, TimeSlot.provider_id == Provider.provider_id)
+        .options(
+            contains_eager(TimeSlot.provider_link).joinedload(Provider.account_link),
+            contains_eager(TimeSlot.provider_link).joinedload(Provider.clinic_link)
+        )
+        .filter(
+            TimeSlot.slot_available.is_(True),
+            TimeSlot.starts_at >= window_start,
+            TimeSlot.starts_at < window_end
+        )
+    )
+    if clinic_id:
+        query = query.filter(Provider.clinic_id == clinic_id)
+
+    return query.order_by(TimeSlot.starts_at, TimeSlot.slot_id).limit(limit).all()
+
+
+def open_slots_for(provider_id):
+    """Open slots for one provider in start order, served from open_slot_cache."""
+    def load():
+        rows = db.session.query(
+            TimeSlot.slot_id, TimeSlot.provider_id, TimeSlot.starts_at, TimeSlot.duration_mins
+        ).filter(
+            TimeSlot.provider_id == provider_id,
+            TimeSlot.slot_available.is_(True)
+        ).order_by(TimeSlot.starts_at).all()
+        return tuple(OpenSlot(*row) for row in rows)
+
+    return open_slot_cache.get_or_load(provider_id, load)
+
+
+def invalidate_open_slots(provider_id):
+    """Drop a provider's cached open slots; call after the change is committed."""
+    open_slot_cache.invalidate(provider_id)
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Cold-start benchmark for the Netlify function handler.
+
+Every run starts a fresh Python process, so module imports and setup are
+paid again exactly as on a Netlify cold start. Each run reports:
+
+  setup      time to import netlify/functions/app.py (app import + DB setup)
+  first req  time for the handler to answer its first GET /
+  stmts      SQL statements issued during setup
+
+"cold db" runs point at a brand new SQLite file, so the schema is created
+and the seed data inserted. "warm db" runs reuse a database that is already
+current, which is the normal production case.
+
+Usage: python scripts/bench_cold_start.py [--runs 5] [--path /]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Runs inside each child process
+CHILD = r'''
+import json, os, sys, time
+started = time.perf_counter()
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+statements = []
+event.listen(Engine, 'before_cursor_execute', lambda *a: statements.append(1))
+
+# Load the function by path: its module name "app" would shadow the real app
+import importlib.util
+spec = importlib.util.spec_from_file_location(
+    'netlify_app', os.path.join(sys.argv[1], 'netlify', 'functions', 'app.py'))
+function = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(function)
+setup = time.perf_counter() - started
+setup_statements = len(statements)
+
+before = time.perf_counter()
+response = function.handler({'httpMethod': 'GET', 'path': sys.argv[2], 'headers': {}}, None)
+first = time.perf_counter() - before
+
+print(json.dumps({'setup': setup, 'first': first, 'stmts': setup_statements,
+                  'status': response['statusCode']}))
+'''
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--path', default='/')
+    return parser.parse_args()
+
+
+def run_once(database, path):
+    env = dict(os.environ, DATABASE_URL=f'sqlite:///{database}')
+    child = subprocess.run(
+        [sys.executable, '-c', CHILD, ROOT, path],
+        env=env, capture_output=True, text=True
+    )
+    if child.returncode:
+        sys.exit(f"Benchmark run failed:\n{child.stderr}")
+    return json.loads(child.stdout.strip().splitlines()[-1])
+
+
+def report(label, results):
+    def ms(key):
+        values = [r[key] * 1000 for r in results]
+        return f"{statistics.median(values):8.1f} ms (min {min(values):.1f}, max {max(values):.1f})"
+
+    print(f"{label}:")
+    print(f"  setup      {ms('setup')}")
+    print(f"  first req  {ms('first')}")
+    print(f"  stmts      {statistics.median(r['stmts'] for r in results):.0f}")
+    print(f"  status     {sorted({r['status'] for r in results})}")
+
+
+def main():
+    args = parse_args()
+    scratch = tempfile.mkdtemp()
+
+    cold = []
+    for i in range(args.runs):
+        cold.append(run_once(os.path.join(scratch, f'cold{i}.db'), args.path))
+
+    warm_db = os.path.join(scratch, 'warm.db')
+    run_once(warm_db, args.path)  # bring the shared database up to date
+    warm = [run_once(warm_db, args.path) for _ in range(args.runs)]
+
+    report('cold db', cold)
+    report('warm db', warm)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark: import time and first-request time of the app.
+
+Every run starts a fresh Python process against a database that is already
+current (the normal production case) and reports:
+
+  import     time to import app.py, including create_app()
+  setup      orchestrate_initial_setup() (one query on a current database)
+  <path>     first request to each path, then the same request again (warm)
+
+Anonymous paths are requested first, then the signed-in paths as --user
+(the session is set directly, so no password hashing is timed). Medians
+over --runs are printed. --json appends one record per invocation
+to a file, so numbers can be tracked release over release.
+
+Usage: python scripts/bench_startup.py [--runs 7]
+       [--path /signin ...] [--user-path /governance/hub ...]
+       [--user admin@facilities.local] [--json FILE]
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+from datetime import datetime, timezone
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+DEFAULT_PATHS = ('/', '/signin')
+DEFAULT_USER_PATHS = ('/governance/hub', '/governance/clinics')
+
+# Runs inside each child process
+CHILD = r'''
+import json, sys, time
+sys.path.insert(0, sys.argv[1])
+config = json.loads(sys.argv[2])
+
+started = time.perf_counter()
+import app as application
+imported = time.perf_counter() - started
+
+started = time.perf_counter()
+application.orchestrate_initial_setup()
+setup = time.perf_counter() - started
+
+app = application.app
+client = app.test_client()
+requests = []
+
+def timed(path):
+    started = time.perf_counter()
+    response = client.get(path)
+    elapsed = time.perf_counter() - started
+    return response.status_code, elapsed
+
+def visit(paths):
+    for path in paths:
+        status, first = timed(path)
+        _, warm = timed(path)
+        requests.append({'path': path, 'status': status, 'first': first, 'warm': warm})
+
+visit(config['paths'])
+if config['user_paths']:
+    from models import db, Account
+    with app.app_context():
+        user_id = db.session.scalar(
+            db.select(Account.account_id).where(Account.email_address == config['user'])
+        )
+    if user_id is None:
+        sys.exit(f"No account {config['user']}")
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user_id)
+        session['_fresh'] = True
+    visit(config['user_paths'])
+
+print(json.dumps({
+    'import': imported,
+    'setup': setup,
+    'requests': requests,
+    'bytecode_bundle': app.jinja_env.bytecode_cache is not None,
+}))
+'''
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--runs', type=int, default=7)
+    parser.add_argument('--path', action='append', dest='paths',
+                        help=f'anonymous path (repeatable; default {" ".join(DEFAULT_PATHS)})')
+    parser.add_argument('--user-path', action='append', dest='user_paths',
+                        help=f'signed-in path (repeatable; default {" ".join(DEFAULT_USER_PATHS)})')
+    parser.add_argument('--user', default='admin@facilities.local')
+    parser.add_argument('--json', dest='json_file', default=None,
+                        help='append the medians as one JSON line to this file')
+    return parser.parse_args()
+
+
+def run_once(database, config):
+    env = dict(os.environ, DATABASE_URL=f'sqlite:///{database}')
+    child = subprocess.run(
+        [sys.executable, '-c', CHILD, ROOT, json.dumps(config)],
+        env=env, capture_output=True, text=True
+    )
+    if child.returncode:
+        sys.exit(f"Benchmark run failed:\n{child.stderr}")
+    return json.loads(child.stdout.strip().splitlines()[-1])
+
+
+def summarize(results):
+    """Median milliseconds for import, setup and each request."""
+    def median_ms(values):
+        return round(statistics.median(values) * 1000, 2)
+
+    summary = {
+        'import_ms': median_ms([r['import'] for r in results]),
+        'setup_ms': median_ms([r['setup'] for r in results]),
+        'requests': [],
+    }
+    for i, request in enumerate(results[0]['requests']):
+        summary['requests'].append({
+            'path': request['path'],
+            'status': request['status'],
+            'first_ms': median_ms([r['requests'][i]['first'] for r in results]),
+            'warm_ms': median_ms([r['requests'][i]['warm'] for r in results]),
+        })
+    summary['first_total_ms'] = round(sum(r['first_ms'] for r in summary['requests']), 2)
+    summary['bytecode_bundle'] = results[0]['bytecode_bundle']
+    return summary
+
+
+def report(summary, runs):
+    print(f"Startup ({runs} runs, median; bytecode bundle {'on' if summary['bytecode_bundle'] else 'off'}):")
+    print(f"  import      {summary['import_ms']:8.1f} ms")
+    print(f"  setup       {summary['setup_ms']:8.1f} ms")
+    for request in summary['requests']:
+        print(f"  {request['path']:<24} first {request['first_ms']:7.1f} ms   "
+              f"warm {request['warm_ms']:6.1f} ms   [{request['status']}]")
+    print(f"  first requests total {summary['first_total_ms']:.1f} ms")
+
+
+def revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                              capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def main():
+    args = parse_args()
+    config = {
+        'paths': args.paths or list(DEFAULT_PATHS),
+        'user_paths': args.user_paths or list(DEFAULT_USER_PATHS),
+        'user': args.user,
+    }
+
+    database = os.path.join(tempfile.mkdtemp(), 'bench.db')
+    run_once(database, config)  # bring the database up to date
+
+    record = {
+        'when': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'revision': revision(),
+        'python': platform.python_version(),
+        'runs': args.runs,
+    }
+    summary = summarize([run_once(database, config) for _ in range(args.runs)])
+    record.update(summary)
+    report(summary, args.runs)
+
+    if args.json_file:
+        with open(args.json_file, 'a', encoding='utf-8') as fh:
+            fh.write(json.dumps(record) + '\n')
+        print(f"Appended results to {args.json_file}")
+
+
+if __name__ == '__main__':
+    main()
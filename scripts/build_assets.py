@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Build the fingerprinted, precompressed stylesheets under static/dist.
+
+Minifies static/style.css and static/theme.css, writes content-hashed copies
+with .gz (and, if brotli is installed, .br) variants plus manifest.json, and
+removes files from earlier builds. Templates pick the hashed names up through
+asset_url() (see assets.py). Run it after editing a stylesheet; the Netlify
+build runs it on every deploy.
+
+Usage: python scripts/build_assets.py
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import assets
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--static-dir', default=assets.STATIC_DIR)
+    args = parser.parse_args()
+
+    manifest = assets.build(args.static_dir)
+    out_dir = os.path.join(args.static_dir, assets.DIST)
+    for name, hashed in sorted(manifest.items()):
+        sizes = [os.path.getsize(os.path.join(args.static_dir, name))]
+        for suffix in ('', '.gz', '.br'):
+            path = os.path.join(args.static_dir, hashed + suffix)
+            if os.path.exists(path):
+                sizes.append(os.path.getsize(path))
+        labels = ['source', 'minified', 'gzip', 'brotli'][:len(sizes)]
+        print(f'{name} -> {hashed}: ' + ', '.join(f'{label} {size:,} B' for label, size in zip(labels, sizes)))
+    if not assets.brotli:
+        print('brotli is not installed; only .gz variants were written.')
+    print(f'Manifest: {os.path.join(out_dir, assets.MANIFEST)}')
+
+
+if __name__ == '__main__':
+    main()
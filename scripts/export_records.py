@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Export sessions or clinical notes as CSV or NDJSON.
+
+Streams rows from the configured DATABASE_URL with the same queries as the
+admin export endpoint (see exports.py), so memory stays flat however large
+the tables are.
+
+Usage: python scripts/export_records.py sessions|notes [--format csv|ndjson]
+       [--from YYYY-MM-DD] [--to YYYY-MM-DD] [--clinic ID] [--provider ID]
+       [--status STATE] [-o FILE]
+"""
+import argparse
+import os
+import sys
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+
+def day(value):
+    return datetime.strptime(value, '%Y-%m-%d')
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('dataset', choices=('sessions', 'notes'))
+    parser.add_argument('--format', choices=('csv', 'ndjson'), default='csv')
+    parser.add_argument('--from', dest='date_from', type=day, default=None)
+    parser.add_argument('--to', dest='date_to', type=day, default=None)
+    parser.add_argument('--clinic', dest='clinic_id', type=int, default=None)
+    parser.add_argument('--provider', dest='provider_id', type=int, default=None)
+    parser.add_argument('--status', default=None, help='session state (sessions only)')
+    parser.add_argument('-o', '--output', default='-', help='output file (default: stdout)')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    from app import app
+    from exports import STREAMERS, export_statement
+
+    out = sys.stdout if args.output == '-' else open(args.output, 'w', newline='')
+    try:
+        with app.app_context():
+            stmt = export_statement(
+                args.dataset, date_from=args.date_from, date_to=args.date_to,
+                clinic_id=args.clinic_id, provider_id=args.provider_id, status=args.status
+            )
+            for chunk in STREAMERS[args.format](stmt):
+                out.write(chunk)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+
+if __name__ == '__main__':
+    main()
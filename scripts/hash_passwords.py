@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Hash every account whose credential is still stored as plain text.
+
+Accounts are streamed in primary-key order, CHUNK rows at a time, and only
+rows whose credential does not already look like a werkzeug hash are read.
+Each chunk is hashed across a process pool and written back in one
+transaction. Each row is updated only if its credential is unchanged since
+it was read, so a password changed mid-run is never overwritten. Committed
+rows no longer match the filter, so an interrupted run can simply be started
+again and carries on where it stopped.
+
+Hashes cannot be re-costed offline. Credentials that are already hashed
+with an older method or cost are re-hashed with the current default the
+next time their owner signs in successfully.
+
+WARNING: back up the database first; plain-text values are overwritten.
+
+Usage: python scripts/hash_passwords.py [--chunk 500] [--workers N] [--method scrypt] [--dry-run]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from credentials import HASH_PREFIXES, hash_many, hash_pool, worker_count
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--chunk', type=int, default=500,
+                        help='accounts hashed and committed per batch')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='hashing processes (default: all cores)')
+    parser.add_argument('--method', default=None,
+                        help='werkzeug hash method, e.g. scrypt or pbkdf2:sha256:600000')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='only count the accounts that still need hashing')
+    return parser.parse_args()
+
+
+def pending_filter(Account):
+    return [~Account.credential_hash.startswith(prefix) for prefix in HASH_PREFIXES] + [
+        Account.credential_hash.isnot(None),
+        Account.credential_hash != ''
+    ]
+
+
+def hash_all_passwords(chunk=500, workers=None, method=None, dry_run=False):
+    from sqlalchemy import bindparam, func, update
+    from app import app
+    from models import db, Account
+
+    with app.app_context():
+        pending = pending_filter(Account)
+        total = db.session.query(func.count(Account.account_id)).filter(*pending).scalar()
+        print(f"{total} account(s) with plain-text credentials.")
+        if dry_run or not total:
+            return 0
+
+        guarded = (
+            update(Account.__table__)
+            .where(Account.__table__.c.account_id == bindparam('b_id'))
+            .where(Account.__table__.c.credential_hash == bindparam('b_plain'))
+            .values(credential_hash=bindparam('b_hash'))
+        )
+
+        updated = 0
+        last_id = 0
+        started = time.perf_counter()
+        print(f"Hashing with {worker_count(workers)} worker(s), {chunk} per batch.")
+
+        with hash_pool(workers) as pool:
+            while True:
+                rows = db.session.query(Account.account_id, Account.credential_hash).filter(
+                    Account.account_id > last_id, *pending
+                ).order_by(Account.account_id).limit(chunk).all()
+                if not rows:
+                    break
+
+                hashes = hash_many((plain for _, plain in rows), method=method, pool=pool)
+                result = db.session.execute(guarded, [
+                    {'b_id': account_id, 'b_plain': plain, 'b_hash': hashed}
+                    for (account_id, plain), hashed in zip(rows, hashes)
+                ])
+                db.session.commit()
+
+                # rowcount is -1 on drivers that do not report executemany counts
+                updated += result.rowcount if result.rowcount >= 0 else len(rows)
+                last_id = rows[-1].account_id
+                elapsed = time.perf_counter() - started
+                rate = updated / elapsed if elapsed else 0.0
+                remaining = max(total - updated, 0)
+                eta = remaining / rate if rate else 0.0
+                print(f"  {updated}/{total} hashed, through account {last_id}"
+                      f" - {rate:.1f}/s, ~{eta:.0f}s left", flush=True)
+
+        elapsed = time.perf_counter() - started
+        print(f"Updated {updated} user(s) with hashed passwords in {elapsed:.1f}s.")
+        return updated
+
+
+def main():
+    args = parse_args()
+    if args.chunk < 1:
+        sys.exit("--chunk must be at least 1")
+    hash_all_passwords(args.chunk, args.workers, args.method, args.dry_run)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Import patient or provider accounts from a CSV file.
+
+Runs the same batched import as the admin page (see importer.py) against the
+configured DATABASE_URL and writes every rejected row, with its line number
+and reason, to an error report CSV.
+
+Usage: python scripts/import_accounts.py patient|provider FILE.csv [--errors report.csv] [--batch 500] [--workers N]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('kind', choices=('patient', 'provider'))
+    parser.add_argument('csv_file')
+    parser.add_argument('--errors', default=None,
+                        help='where to write rejected rows (default: FILE.errors.csv)')
+    parser.add_argument('--batch', type=int, default=500)
+    parser.add_argument('--workers', type=int, default=None,
+                        help='hashing processes (default: all cores)')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    from app import app
+    from importer import import_accounts
+
+    started = time.perf_counter()
+    with app.app_context(), open(args.csv_file, newline='', encoding='utf-8-sig') as stream:
+        try:
+            report = import_accounts(stream, args.kind, batch_size=args.batch, workers=args.workers)
+        except ValueError as e:
+            sys.exit(f"ERROR: {e}")
+    elapsed = time.perf_counter() - started
+
+    print(f"Imported {report.created} {args.kind} account(s) in {elapsed:.1f}s.")
+    if report.errors:
+        errors_path = args.errors or os.path.splitext(args.csv_file)[0] + '.errors.csv'
+        with open(errors_path, 'w', newline='') as out:
+            out.write(report.error_csv())
+        print(f"Rejected {report.rejected} row(s); details in {errors_path}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Precompile every Jinja template into the bytecode bundle the app loads.
+
+Writes instance/template_bytecode (see template_cache.py), replacing any
+earlier bundle. Run it as part of the build, after any template change; the
+app picks the bundle up on its next start. Templates that fail to compile are
+listed and left out, and the exit status is 1 only with --strict.
+
+Usage: python scripts/precompile_templates.py [--strict]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--strict', action='store_true',
+                        help='exit with status 1 if any template fails to compile')
+    args = parser.parse_args()
+
+    from app import app
+    import template_cache
+
+    started = time.perf_counter()
+    compiled, failed = template_cache.precompile(app)
+    elapsed = time.perf_counter() - started
+
+    print(f'{len(compiled)} templates compiled in {elapsed:.2f}s -> {template_cache.BUNDLE_DIR}')
+    for name, exc in sorted(failed.items()):
+        print(f'  skipped {name}: {exc}')
+    if failed and args.strict:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Concurrent booking stress test for clientele.book_session.
+
+Builds a throwaway SQLite database, publishes a handful of slots, then lets
+many patients race to book them from parallel threads through the real
+Flask routes. Exits non-zero if any slot ends up with more than one live
+session or if the slot flags disagree with the sessions table.
+
+Usage: python scripts/stress_booking.py [--patients 200] [--slots 10] [--threads 32]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--patients', type=int, default=200)
+    parser.add_argument('--slots', type=int, default=10)
+    parser.add_argument('--threads', type=int, default=32)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    # Point the app at a scratch database before it is imported
+    scratch = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
+    scratch.close()
+    os.environ['DATABASE_URL'] = f'sqlite:///{scratch.name}'
+    # Every simulated patient signs in from the same address
+    os.environ['AUTH_IP_PER_MINUTE'] = os.environ['AUTH_IP_BURST'] = str(args.patients * 10)
+
+    from werkzeug.security import generate_password_hash
+    from app import app
+    from models import db, Account, AccessLevel, Provider, Recipient, TimeSlot, Session
+    from migrations import upgrade
+
+    password = 'stress-pass'
+    # Cheap hash so the run measures booking, not password checks
+    credential = generate_password_hash(password, method='pbkdf2:sha256:1')
+
+    with app.app_context():
+        db.create_all()
+        upgrade()
+        for tier in ('admin', 'provider', 'patient'):
+            db.session.add(AccessLevel(tier_name=tier))
+        db.session.commit()
+
+        provider_tier = AccessLevel.query.filter_by(tier_name='provider').first()
+        patient_tier = AccessLevel.query.filter_by(tier_name='patient').first()
+
+        doctor = Account(email_address='doctor@stress.local', credential_hash=credential,
+                         given_name='Stress', surname='Doctor', access_tier=provider_tier)
+        db.session.add(doctor)
+        db.session.flush()
+        db.session.add(Provider(provider_id=doctor.account_id))
+
+        first_slot = datetime.utcnow().replace(minute=0, second=0, microsecond=0) + timedelta(days=1)
+        slots = [
+            TimeSlot(provider_id=doctor.account_id, starts_at=first_slot + timedelta(hours=i),
+                     duration_mins=60, slot_available=True)
+            for i in range(args.slots)
+        ]
+        db.session.add_all(slots)
+
+        emails = [f'patient{i}@stress.local' for i in range(args.patients)]
+        for email in emails:
+            acct = Account(email_address=email, credential_hash=credential, access_tier=patient_tier)
+            db.session.add(acct)
+            db.session.flush()
+            db.session.add(Recipient(recipient_id=acct.account_id))
+        db.session.commit()
+        slot_ids = [s.slot_id for s in slots]
+
+    def attempt(i):
+        client = app.test_client()
+        client.post('/signin', data={'email_address': emails[i], 'credential': password})
+        response = client.post('/clientele/book', data={'slot_id': slot_ids[i % len(slot_ids)]})
+        return response.headers.get('Location', '').endswith('/clientele/hub')
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        results = list(pool.map(attempt, range(args.patients)))
+    elapsed = time.perf_counter() - started
+
+    with app.app_context():
+        live = Session.query.filter(Session.session_state != 'cancelled').all()
+        per_slot = Counter(s.slot_id for s in live)
+        doubled = {slot: n for slot, n in per_slot.items() if n > 1}
+        taken = {s.slot_id for s in TimeSlot.query.filter_by(slot_available=False).all()}
+
+    os.remove(scratch.name)
+
+    print(f"Attempts:        {args.patients} over {args.threads} threads")
+    print(f"Successful:      {sum(results)} (slots available: {args.slots})")
+    print(f"Throughput:      {args.patients / elapsed:.1f} attempts/s")
+    print(f"Double bookings: {len(doubled)}")
+
+    if doubled or sum(results) != len(per_slot) or taken != set(per_slot):
+        print("FAIL: booking state is inconsistent")
+        sys.exit(1)
+    print("OK: every slot has at most one live session")
+
+
+if __name__ == '__main__':
+    main()
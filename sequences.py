@@ -0,0 +1,66 @@
+"""
+Atomic per-key sequence counters for human-readable IDs.
+
+``allocate`` increments one row of the ``id_sequence`` table with a single
+``UPDATE ... SET last_value = last_value + 1`` inside the caller's
+transaction. The row stays locked until that transaction commits, so two
+concurrent registrations can never draw the same number. The cost is a
+primary-key lookup however many rows the clinic already has.
+"""
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+
+from models import db, IdSequence
+
+sequence_table = IdSequence.__table__
+
+
+def _increment(key, count=1):
+    return (
+        update(sequence_table)
+        .where(sequence_table.c.sequence_key == key)
+        .values(last_value=sequence_table.c.last_value + count)
+    )
+
+
+def allocate(key, seed=None, count=1):
+    """
+    Return the next number for ``key``.
+
+    ``seed`` is called at most once per key, the first time it is used, and
+    should return the highest number already handed out by older code (or 0).
+    With ``count`` > 1 a whole block is reserved in the same statement and the
+    last number of the block is returned (see ``allocate_block``).
+    """
+    if db.session.execute(_increment(key, count)).rowcount == 0:
+        start = seed() if seed else 0
+        try:
+            with db.session.begin_nested():
+                db.session.add(IdSequence(sequence_key=key, last_value=start + count))
+        except IntegrityError:
+            # Another transaction created the row first; take the next values
+            db.session.execute(_increment(key, count))
+
+    return db.session.execute(
+        select(sequence_table.c.last_value).where(sequence_table.c.sequence_key == key)
+    ).scalar_one()
+
+
+def allocate_block(key, count, seed=None):
+    """Reserve ``count`` consecutive numbers for ``key`` and return them as a range."""
+    last = allocate(key, seed=seed, count=count)
+    return range(last - count + 1, last + 1)
+
+
+def highest_suffix(column, prefix):
+    """
+    Seed helper: largest trailing number among ``column`` values starting
+    with ``prefix`` (e.g. ``C-`` matches ``C-007``). Used once per key.
+    """
+    highest = 0
+    rows = db.session.execute(select(column).where(column.like(f"{prefix}%")))
+    for (value,) in rows:
+        tail = value[len(prefix):]
+        if tail.isdigit():
+            highest = max(highest, int(tail))
+    return highest
@@ -0,0 +1,69 @@
+"""
+Precompiled Jinja bytecode for faster first renders.
+
+Jinja parses and compiles a template to Python bytecode the first time each
+process renders it. ``scripts/precompile_templates.py`` does that work at
+build time for every template and stores the result in
+``instance/template_bytecode``. When that directory exists, ``init_app``
+points the Jinja environment at it, so a cold Netlify invocation or a fresh
+WSGI worker only unmarshals code objects on its first render.
+
+Entries are keyed by template name alone, not by absolute path, so a bundle
+built in one checkout works from another (Netlify builds and runs from
+different directories). Jinja stores a checksum of the source with every
+entry, and entries also carry the Python version. An edited template, or a
+bundle built with another Python, is recompiled as usual rather than served
+stale. If the directory is writable, recompiled templates are written back.
+"""
+import os
+from hashlib import sha1
+
+from jinja2 import FileSystemBytecodeCache
+
+BUNDLE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'instance', 'template_bytecode')
+
+
+class TemplateBytecodeCache(FileSystemBytecodeCache):
+    """Filesystem bytecode cache keyed by template name, tolerant of read-only bundles."""
+
+    def __init__(self, directory=BUNDLE_DIR):
+        super().__init__(directory, '%s.jinja')
+
+    def get_cache_key(self, name, filename=None):
+        return sha1(name.encode('utf-8')).hexdigest()
+
+    def dump_bytecode(self, bucket):
+        try:
+            super().dump_bytecode(bucket)
+        except OSError:
+            # Read-only deployment (e.g. a serverless bundle): serve what we have
+            pass
+
+
+def precompile(app, directory=BUNDLE_DIR):
+    """
+    Compile every template of ``app`` into a fresh bundle at ``directory``.
+    Returns (compiled_names, {name: error}) for templates that fail to compile.
+    """
+    os.makedirs(directory, exist_ok=True)
+    cache = TemplateBytecodeCache(directory)
+    cache.clear()
+
+    env = app.jinja_env.overlay(bytecode_cache=cache, cache_size=0)
+    compiled, failed = [], {}
+    for name in env.list_templates(extensions=('html', 'htm', 'txt', 'xml')):
+        try:
+            env.get_template(name)
+        except Exception as exc:  # report every broken template, keep going
+            failed[name] = exc
+        else:
+            compiled.append(name)
+    return compiled, failed
+
+
+def init_app(app, directory=BUNDLE_DIR):
+    """Use the precompiled bundle when one has been built; returns whether it is in use."""
+    if not os.path.isdir(directory):
+        return False
+    app.jinja_env.bytecode_cache = TemplateBytecodeCache(directory)
+    return True
@@ -0,0 +1,97 @@
+"""
+Shared fixtures. The app is imported once per test session against a
+throwaway SQLite database, never instance/app.db.
+"""
+import os
+import sys
+import tempfile
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+_scratch = tempfile.mkdtemp(prefix='hms-tests-')
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(_scratch, 'app.db')
+
+ADMIN_EMAIL = 'admin@facilities.local'
+
+
+@pytest.fixture(scope='session')
+def app():
+    from app import app, orchestrate_initial_setup
+    app.config['TESTING'] = True
+    orchestrate_initial_setup()
+    return app
+
+
+@pytest.fixture(scope='session')
+def scratch_dir():
+    return _scratch
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def sign_in_as(client, email):
+    """Put ``email``'s account in the client's session without hashing a password."""
+    from models import db, Account
+    with client.application.app_context():
+        account_id = db.session.scalar(db.select(Account.account_id).where(Account.email_address == email))
+    with client.session_transaction() as session:
+        session['_user_id'] = str(account_id)
+        session['_fresh'] = True
+    return client
+
+
+@pytest.fixture
+def admin_client(client):
+    return sign_in_as(client, ADMIN_EMAIL)
+
+
+@contextmanager
+def count_statements(app):
+    """Yield a list that receives one entry per SQL statement executed."""
+    from models import db
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+
+
+def seed_people(app, count, tag):
+    """Add ``count`` providers, patients and booked sessions between them."""
+    from models import db, AccessLevel, Account, Clinic, Provider, Recipient, Session
+    with app.app_context():
+        tiers = dict(db.session.query(AccessLevel.tier_name, AccessLevel.tier_id))
+        clinics = [c for (c,) in db.session.query(Clinic.clinic_id).order_by(Clinic.clinic_id).limit(5)]
+        booked = datetime(2030, 1, 1, 9)
+        for i in range(count):
+            clinic_id = clinics[i % len(clinics)]
+            doctor = Account(email_address=f'doc-{tag}-{i}@example.test', credential_hash='x',
+                             given_name='Doc', surname=f'{tag}{i}', tier_id=tiers['provider'])
+            patient = Account(email_address=f'pat-{tag}-{i}@example.test', credential_hash='x',
+                              given_name='Pat', surname=f'{tag}{i}', tier_id=tiers['patient'])
+            db.session.add_all([doctor, patient])
+            db.session.flush()
+            db.session.add_all([
+                Provider(provider_id=doctor.account_id, clinic_id=clinic_id, expertise='General'),
+                Recipient(recipient_id=patient.account_id, clinic_id=clinic_id),
+            ])
+            db.session.flush()
+            db.session.add(Session(provider_id=doctor.account_id, recipient_id=patient.account_id,
+                                   booked_timestamp=booked + timedelta(hours=i)))
+        db.session.commit()
@@ -0,0 +1,67 @@
+"""ETags and per-process caches for provider pages (conditional.py)."""
+from datetime import datetime, timedelta
+
+from conftest import seed_people, sign_in_as
+
+
+def provider_ids(app, tag):
+    from models import db, Account
+    with app.app_context():
+        return list(db.session.scalars(
+            db.select(Account.account_id).where(Account.email_address.like(f'doc-{tag}-%'))
+            .order_by(Account.account_id)
+        ))
+
+
+def test_slot_change_only_invalidates_that_provider(app, client):
+    from models import db, TimeSlot
+    from scheduling import open_slot_cache, publish_slots
+
+    seed_people(app, 2, 'etag')
+    first, second = provider_ids(app, 'etag')
+    start = datetime(2031, 3, 3, 9)
+    with app.app_context():
+        for provider_id in (first, second):
+            publish_slots(provider_id, [(start, 30)])
+
+    sign_in_as(client, 'pat-etag-0@example.test')
+    etags = {}
+    for provider_id in (first, second):
+        response = client.get(f'/clientele/providers/{provider_id}')
+        assert response.status_code == 200
+        etags[provider_id] = response.headers['ETag']
+    assert open_slot_cache.get(first) and open_slot_cache.get(second)
+
+    # Another worker adds a slot for the second provider: this process only
+    # learns about it through the data_version table
+    with app.app_context():
+        db.session.add(TimeSlot(provider_id=second, starts_at=start + timedelta(hours=1),
+                                duration_mins=30, slot_available=True))
+        db.session.commit()
+    assert len(open_slot_cache.get(second)) == 1
+
+    response = client.get(f'/clientele/providers/{first}', headers={'If-None-Match': etags[first]})
+    assert response.status_code == 304
+    assert open_slot_cache.get(first) is not None
+
+    response = client.get(f'/clientele/providers/{second}', headers={'If-None-Match': etags[second]})
+    assert response.status_code == 200
+    assert len(open_slot_cache.get(second)) == 2
+
+
+def test_withdrawn_slots_change_the_providers_etag(app, client):
+    from scheduling import publish_slots, withdraw_slots
+
+    seed_people(app, 1, 'withdraw')
+    (provider_id,) = provider_ids(app, 'withdraw')
+    start = datetime(2031, 4, 7, 9)
+    with app.app_context():
+        publish_slots(provider_id, [(start, 30)])
+
+    sign_in_as(client, 'pat-withdraw-0@example.test')
+    etag = client.get(f'/clientele/providers/{provider_id}').headers['ETag']
+    with app.app_context():
+        assert withdraw_slots(provider_id, start.date(), start.date()) == 1
+
+    response = client.get(f'/clientele/providers/{provider_id}', headers={'If-None-Match': etag})
+    assert response.status_code == 200
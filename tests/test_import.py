@@ -0,0 +1,38 @@
+"""CSV account import without process pools (serverless workers)."""
+import io
+
+import pytest
+
+
+@pytest.fixture
+def no_process_pools(monkeypatch):
+    import credentials
+    import importer
+
+    def unavailable(workers=None):
+        raise OSError(38, 'Function not implemented')
+
+    monkeypatch.setattr(credentials, 'hash_pool', unavailable)
+    monkeypatch.setattr(importer, 'hash_pool', unavailable)
+
+
+def accounts_csv(tag, count):
+    lines = ['email_address,credential,given_name,surname,clinic']
+    lines += [f'imp-{tag}-{i}@example.test,secret{i},Imp,{tag}{i},1' for i in range(count)]
+    return '\n'.join(lines) + '\n'
+
+
+def test_web_import_hashes_inline(admin_client, no_process_pools):
+    response = admin_client.post('/governance/accounts/import', data={
+        'kind': 'patient',
+        'csv_file': (io.BytesIO(accounts_csv('web', 5).encode()), 'patients.csv'),
+    }, content_type='multipart/form-data')
+    assert response.status_code == 200
+    assert b'5 patient account(s) imported.' in response.data
+
+
+def test_import_falls_back_to_inline_hashing(app, no_process_pools):
+    from importer import import_accounts
+    with app.app_context():
+        report = import_accounts(io.StringIO(accounts_csv('cli', 5)), 'patient', workers=4)
+    assert (report.created, report.rejected) == (5, 0)
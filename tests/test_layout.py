@@ -0,0 +1,22 @@
+"""Navigation rendered by templates/base.html."""
+from conftest import seed_people, sign_in_as
+
+
+def test_provider_sidebar_links_to_note_search(app, client):
+    seed_people(app, 1, 'sidebar')
+    sign_in_as(client, 'doc-sidebar-0@example.test')
+    with app.test_request_context():
+        from flask import url_for
+        search_url = url_for('provision.search_clinical_notes')
+
+    page = client.get('/provision/hub').get_data(as_text=True)
+    sidebar = page.split('class="app-sidebar"', 1)[1].split('</aside>', 1)[0]
+    assert f'href="{search_url}"' in sidebar
+
+
+def test_fragment_cache_can_be_turned_off(app, monkeypatch):
+    from app import create_app
+    assert app.jinja_env.fragment_cache_enabled
+
+    monkeypatch.setenv('FRAGMENT_CACHE', '0')
+    assert create_app().jinja_env.fragment_cache_enabled is False
@@ -0,0 +1,24 @@
+"""The admin list views must issue the same number of queries however many rows exist."""
+from conftest import count_statements, seed_people
+
+LIST_VIEWS = ('/governance/providers', '/governance/recipients', '/governance/sessions')
+
+
+def statements_per_view(app, client):
+    counts = {}
+    for path in LIST_VIEWS:
+        client.get(path)  # warm the per-process caches first
+        with count_statements(app) as statements:
+            assert client.get(path).status_code == 200
+        counts[path] = len(statements)
+    return counts
+
+
+def test_list_view_query_count_does_not_grow_with_rows(app, admin_client):
+    seed_people(app, 3, 'small')
+    small = statements_per_view(app, admin_client)
+
+    seed_people(app, 40, 'large')
+    large = statements_per_view(app, admin_client)
+
+    assert small == large
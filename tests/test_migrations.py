@@ -0,0 +1,55 @@
+"""Upgrading databases written by older versions of the app."""
+from datetime import datetime
+
+import pytest
+from sqlalchemy import text
+
+from conftest import seed_people
+
+
+@pytest.fixture
+def legacy_app(app, scratch_dir, monkeypatch, tmp_path):
+    """A second app on its own database, brought to the current schema."""
+    from app import create_app
+    monkeypatch.setenv('DATABASE_URL', f"sqlite:///{tmp_path / 'legacy.db'}")
+    legacy = create_app()
+    with legacy.app_context():
+        from models import db
+        db.create_all()
+    return legacy
+
+
+def test_upgrade_resolves_double_booked_slots(legacy_app):
+    from app import initial_setup
+    from migrations import existing_indexes, upgrade, verify_indexes
+    from models import db, Session, SchemaRevision, TimeSlot
+
+    with legacy_app.app_context():
+        upgrade()
+        initial_setup()
+    seed_people(legacy_app, 2, 'legacy')
+
+    with legacy_app.app_context():
+        # Roll the database back to before 0006: no unique index, two live
+        # bookings on one slot, as the original booking code allowed
+        db.session.execute(text('DROP INDEX uq_session_active_slot'))
+        db.session.query(SchemaRevision).filter(
+            (SchemaRevision.revision_id >= '0006') | SchemaRevision.revision_id.like('setup:%')
+        ).delete(synchronize_session=False)
+        first, second = db.session.query(Session).order_by(Session.session_id).limit(2).all()
+        slot = TimeSlot(provider_id=first.provider_id, starts_at=datetime(2030, 2, 1, 9), slot_available=False)
+        db.session.add(slot)
+        db.session.flush()
+        first.slot_id = second.slot_id = slot.slot_id
+        second.booked_timestamp = first.booked_timestamp.replace(year=2031)
+        db.session.commit()
+        keep, drop = first.session_id, second.session_id
+
+        applied = upgrade()
+
+        assert '0006_unique_active_slot' in applied
+        assert 'uq_session_active_slot' in existing_indexes('session')
+        assert verify_indexes() == []
+        states = dict(db.session.query(Session.session_id, Session.session_state)
+                      .filter(Session.session_id.in_([keep, drop])))
+        assert states == {keep: 'scheduled', drop: 'cancelled'}
@@ -0,0 +1,58 @@
+"""The Netlify function adapter in netlify/functions/app.py."""
+import importlib.util
+import os
+from urllib.parse import urlencode
+
+import pytest
+
+from conftest import ROOT
+
+
+@pytest.fixture(scope='module')
+def function(app):
+    path = os.path.join(ROOT, 'netlify', 'functions', 'app.py')
+    spec = importlib.util.spec_from_file_location('netlify_function_app', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture
+def tight_ip_limit(app):
+    import admission
+    admission.init_app(app)  # size everything first, as the first guarded POST would
+    admission.ip_buckets.configure(per_minute=1, burst=2)
+    admission.ip_buckets.clear()
+    yield
+    admission.ip_buckets.configure(app.config['AUTH_IP_PER_MINUTE'], app.config['AUTH_IP_BURST'])
+    admission.ip_buckets.clear()
+
+
+def sign_in_event(headers, attempt):
+    body = urlencode({'email_address': f'nobody-{attempt}@example.test', 'credential': 'x'})
+    return {
+        'httpMethod': 'POST',
+        'path': '/signin',
+        'headers': dict(headers, **{'content-type': 'application/x-www-form-urlencoded'}),
+        'body': body,
+    }
+
+
+@pytest.mark.parametrize('headers', [
+    {'x-nf-client-connection-ip': '203.0.113.7'},
+    {'client-ip': '203.0.113.7'},
+    {'X-Forwarded-For': '203.0.113.7, 10.0.0.1'},
+])
+def test_client_ip_headers(function, headers):
+    assert function.client_ip(headers) == '203.0.113.7'
+
+
+def test_one_clients_limit_does_not_throttle_another(function, tight_ip_limit):
+    first = {'x-nf-client-connection-ip': '198.51.100.1'}
+    second = {'x-nf-client-connection-ip': '198.51.100.2'}
+
+    statuses = [function.handler(sign_in_event(first, i), None)['statusCode'] for i in range(3)]
+    assert statuses[:2] == [200, 200]
+    assert statuses[2] == 429
+
+    assert function.handler(sign_in_event(second, 3), None)['statusCode'] == 200
@@ -0,0 +1,26 @@
+"""Sign-in behaviour that the list and migration tests do not cover."""
+from werkzeug.security import check_password_hash, generate_password_hash
+
+from conftest import seed_people
+
+
+def test_signin_rehashes_credentials_made_with_an_older_cost(app, client):
+    from credentials import default_method, hash_method
+    from models import db, Account
+
+    seed_people(app, 1, 'rehash')
+    email = 'pat-rehash-0@example.test'
+    legacy = generate_password_hash('letmein', method='pbkdf2:sha256:1000')
+    with app.app_context():
+        account = db.session.scalar(db.select(Account).where(Account.email_address == email))
+        account.credential_hash = legacy
+        db.session.commit()
+
+    response = client.post('/signin', data={'email_address': email, 'credential': 'letmein'})
+    assert response.status_code == 302
+
+    with app.app_context():
+        stored = db.session.scalar(db.select(Account.credential_hash).where(Account.email_address == email))
+    assert stored != legacy
+    assert hash_method(stored) == default_method()
+    assert check_password_hash(stored, 'letmein')